@@ -0,0 +1,49 @@
+"""index comments and fix created_at defaults
+
+Revision ID: 0b8e4f2d6a91
+Revises: f7b3d1a86c25
+Create Date: 2026-10-17 13:32:16.470283
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b8e4f2d6a91'
+down_revision: Union[str, Sequence[str], None] = 'f7b3d1a86c25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('comments', 'favorites', 'notifications')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.alter_column(
+            table, 'created_at',
+            type_=sa.DateTime(timezone=True),
+            postgresql_using="created_at AT TIME ZONE 'UTC'",
+            server_default=sa.text('now()'),
+        )
+    op.execute("UPDATE comments SET created_at = now() WHERE created_at IS NULL")
+    op.alter_column('comments', 'created_at', nullable=False)
+    op.create_index(
+        'ix_comments_movie_id_created_at_id', 'comments', ['movie_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_movie_id_created_at_id', table_name='comments')
+    op.alter_column('comments', 'created_at', nullable=True)
+    for table in TABLES:
+        op.alter_column(
+            table, 'created_at',
+            type_=sa.DateTime(),
+            postgresql_using="created_at AT TIME ZONE 'UTC'",
+            server_default=None,
+        )
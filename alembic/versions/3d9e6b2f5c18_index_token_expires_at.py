@@ -0,0 +1,40 @@
+"""index token expires_at
+
+Revision ID: 3d9e6b2f5c18
+Revises: 0b8e4f2d6a91
+Create Date: 2026-10-17 15:04:41.209316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9e6b2f5c18'
+down_revision: Union[str, Sequence[str], None] = '0b8e4f2d6a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('activation_tokens', 'password_reset_tokens', 'refresh_tokens')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # refresh_tokens can be large; build the indexes without blocking writes.
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                op.f(f'ix_{table}_expires_at'), table, ['expires_at'],
+                unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(
+                op.f(f'ix_{table}_expires_at'), table_name=table,
+                postgresql_concurrently=True, if_exists=True
+            )
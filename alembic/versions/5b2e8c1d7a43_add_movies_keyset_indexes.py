@@ -0,0 +1,34 @@
+"""add movies keyset indexes
+
+Revision ID: 5b2e8c1d7a43
+Revises: 9028f4422946
+Create Date: 2026-10-17 10:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e8c1d7a43'
+down_revision: Union[str, Sequence[str], None] = '9028f4422946'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_movies_year_id', 'movies', ['year', 'id'], unique=False)
+    op.create_index('ix_movies_price_id', 'movies', ['price', 'id'], unique=False)
+    op.create_index('ix_movies_imdb_id', 'movies', ['imdb', 'id'], unique=False)
+    op.create_index('ix_movies_votes_id', 'movies', ['votes', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movies_votes_id', table_name='movies')
+    op.drop_index('ix_movies_imdb_id', table_name='movies')
+    op.drop_index('ix_movies_price_id', table_name='movies')
+    op.drop_index('ix_movies_year_id', table_name='movies')
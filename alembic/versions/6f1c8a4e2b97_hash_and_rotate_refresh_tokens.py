@@ -0,0 +1,50 @@
+"""hash and rotate refresh tokens
+
+Revision ID: 6f1c8a4e2b97
+Revises: 3d9e6b2f5c18
+Create Date: 2026-10-17 15:41:08.552740
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f1c8a4e2b97'
+down_revision: Union[str, Sequence[str], None] = '3d9e6b2f5c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('refresh_tokens', sa.Column('family_id', sa.String(length=32), nullable=True))
+    # Existing sessions keep working: each becomes its own rotation family and
+    # its stored JWT is replaced by the digest the application now looks up.
+    op.execute(
+        "UPDATE refresh_tokens SET "
+        "token = encode(sha256(convert_to(token, 'UTF8')), 'hex'), "
+        "family_id = md5(id::text || clock_timestamp()::text)"
+    )
+    op.alter_column('refresh_tokens', 'family_id', nullable=False)
+    op.alter_column(
+        'refresh_tokens', 'token',
+        existing_type=sa.String(length=512), type_=sa.String(length=64), existing_nullable=False
+    )
+    op.create_index(op.f('ix_refresh_tokens_family_id'), 'refresh_tokens', ['family_id'], unique=False)
+    op.create_index('ix_refresh_tokens_user_id_id', 'refresh_tokens', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_refresh_tokens_user_id_id', table_name='refresh_tokens')
+    op.drop_index(op.f('ix_refresh_tokens_family_id'), table_name='refresh_tokens')
+    # Stored digests cannot be turned back into tokens, so sessions are dropped.
+    op.execute("DELETE FROM refresh_tokens")
+    op.alter_column(
+        'refresh_tokens', 'token',
+        existing_type=sa.String(length=64), type_=sa.String(length=512), existing_nullable=False
+    )
+    op.drop_column('refresh_tokens', 'family_id')
@@ -0,0 +1,29 @@
+"""index purchased_movies by user and movie
+
+Revision ID: 8a4d2c7f1e53
+Revises: 6f1c8a4e2b97
+Create Date: 2026-10-17 16:27:53.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4d2c7f1e53'
+down_revision: Union[str, Sequence[str], None] = '6f1c8a4e2b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_purchased_movies_user_id_movie_id', 'purchased_movies', ['user_id', 'movie_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_purchased_movies_user_id_movie_id', table_name='purchased_movies')
@@ -0,0 +1,49 @@
+"""add movies search vector
+
+Revision ID: a7d3f09e2c61
+Revises: 5b2e8c1d7a43
+Create Date: 2026-10-17 11:03:52.907115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3f09e2c61'
+down_revision: Union[str, Sequence[str], None] = '5b2e8c1d7a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('movies', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute("""
+        UPDATE movies SET search_vector =
+            setweight(to_tsvector('english'::regconfig, coalesce(movies.name, '')), 'A')
+            || setweight(to_tsvector('english'::regconfig, coalesce((
+                SELECT string_agg(directors.name, ' ')
+                FROM directors JOIN movie_directors ON movie_directors.director_id = directors.id
+                WHERE movie_directors.movie_id = movies.id
+            ), '')), 'B')
+            || setweight(to_tsvector('english'::regconfig, coalesce((
+                SELECT string_agg(stars.name, ' ')
+                FROM stars JOIN movie_stars ON movie_stars.star_id = stars.id
+                WHERE movie_stars.movie_id = movies.id
+            ), '')), 'B')
+            || setweight(to_tsvector('english'::regconfig, coalesce(movies.description, '')), 'C');
+    """)
+    op.create_index(
+        'ix_movies_search_vector', 'movies', ['search_vector'],
+        unique=False, postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movies_search_vector', table_name='movies', postgresql_using='gin')
+    op.drop_column('movies', 'search_vector')
@@ -0,0 +1,29 @@
+"""index orders and order_items for cart checkout
+
+Revision ID: b2e7f0c3d841
+Revises: 8a4d2c7f1e53
+Create Date: 2026-10-17 17:12:40.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e7f0c3d841'
+down_revision: Union[str, Sequence[str], None] = '8a4d2c7f1e53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_user_id_status', 'orders', ['user_id', 'status'], unique=False)
+    op.create_index('ix_order_items_order_id_movie_id', 'order_items', ['order_id', 'movie_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_order_items_order_id_movie_id', table_name='order_items')
+    op.drop_index('ix_orders_user_id_status', table_name='orders')
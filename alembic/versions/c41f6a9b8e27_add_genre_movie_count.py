@@ -0,0 +1,39 @@
+"""add genre movie count
+
+Revision ID: c41f6a9b8e27
+Revises: a7d3f09e2c61
+Create Date: 2026-10-17 11:48:19.552830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f6a9b8e27'
+down_revision: Union[str, Sequence[str], None] = 'a7d3f09e2c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('genres', sa.Column('movie_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE genres SET movie_count = counts.movie_count
+        FROM (
+            SELECT genre_id, count(*) AS movie_count
+            FROM movie_genres
+            GROUP BY genre_id
+        ) AS counts
+        WHERE counts.genre_id = genres.id;
+    """)
+    op.create_index('ix_movie_genres_genre_id_movie_id', 'movie_genres', ['genre_id', 'movie_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movie_genres_genre_id_movie_id', table_name='movie_genres')
+    op.drop_column('genres', 'movie_count')
@@ -0,0 +1,38 @@
+"""allow in-progress idempotency keys
+
+Revision ID: e4b7c1d9a620
+Revises: d9c3a5e8f214
+Create Date: 2026-10-17 19:12:05.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c1d9a620'
+down_revision: Union[str, Sequence[str], None] = 'd9c3a5e8f214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('idempotency_keys', 'response_status', existing_type=sa.Integer(), nullable=True)
+    op.alter_column(
+        'idempotency_keys', 'response_body',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM idempotency_keys WHERE response_status IS NULL")
+    op.alter_column(
+        'idempotency_keys', 'response_body',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=False
+    )
+    op.alter_column('idempotency_keys', 'response_status', existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,39 @@
+"""add movie rating aggregates
+
+Revision ID: e5a2c7d94f10
+Revises: c41f6a9b8e27
+Create Date: 2026-10-17 12:41:07.318254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a2c7d94f10'
+down_revision: Union[str, Sequence[str], None] = 'c41f6a9b8e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('movies', sa.Column('rating_sum', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('movies', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE movies SET rating_sum = totals.rating_sum, rating_count = totals.rating_count
+        FROM (
+            SELECT movie_id, sum(rating) AS rating_sum, count(*) AS rating_count
+            FROM ratings
+            GROUP BY movie_id
+        ) AS totals
+        WHERE totals.movie_id = movies.id;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('movies', 'rating_count')
+    op.drop_column('movies', 'rating_sum')
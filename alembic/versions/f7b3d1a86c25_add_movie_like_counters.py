@@ -0,0 +1,43 @@
+"""add movie like counters
+
+Revision ID: f7b3d1a86c25
+Revises: e5a2c7d94f10
+Create Date: 2026-10-17 13:05:52.904617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b3d1a86c25'
+down_revision: Union[str, Sequence[str], None] = 'e5a2c7d94f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('movies', sa.Column('likes_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('movies', sa.Column('dislikes_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE movies SET likes_count = counts.likes_count, dislikes_count = counts.dislikes_count
+        FROM (
+            SELECT movie_id,
+                   count(*) FILTER (WHERE is_like) AS likes_count,
+                   count(*) FILTER (WHERE NOT is_like) AS dislikes_count
+            FROM movie_likes
+            GROUP BY movie_id
+        ) AS counts
+        WHERE counts.movie_id = movies.id;
+    """)
+    op.create_index('ix_movies_likes_count_id', 'movies', ['likes_count', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movies_likes_count_id', table_name='movies')
+    op.drop_column('movies', 'dislikes_count')
+    op.drop_column('movies', 'likes_count')
@@ -0,0 +1,215 @@
+"""
+Load-test the accounts flow in-process: register -> activate -> login ->
+refresh -> me, driven through the real FastAPI app with httpx's ASGI
+transport. Each step runs as its own wave so throughput and latency are
+reported per endpoint. A breakdown section then times bcrypt, JWT signing
+and the RefreshToken INSERT in isolation.
+
+Runs against the database configured in .env (the app is Postgres-only).
+Outgoing emails are replaced with a no-op sender, and all benchmark users
+are deleted afterwards:
+
+    python -m benchmarks.accounts_flow --users 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete, select
+
+from src.config.dependencies import get_accounts_email_notificator, get_jwt_manager, get_password_hasher
+from src.config.settings_instance import get_settings
+from src.crud import new_refresh_token_claims, store_refresh_token
+from src.database.models.accounts import ActivationTokenModel, PasswordResetToken, RefreshToken, UserModel
+from src.database.session_postgres import AsyncPostgresqlSessionLocal, postgresql_engine
+from src.main import app
+from src.notifications.interfaces import EmailSenderInterface
+
+PASSWORD = "Bench-Passw0rd!"
+
+
+class NullEmailSender(EmailSenderInterface):
+
+    async def send_activation_email(self, email: str, activation_link: str) -> None:
+        pass
+
+    async def send_activation_complete_email(self, email: str, login_link: str) -> None:
+        pass
+
+    async def send_password_reset_email(self, email, reset_link: str) -> None:
+        pass
+
+    async def send_password_reset_complete_email(self, email, login_link: str) -> None:
+        pass
+
+    async def send_password_change_complete_email(self, email, login_link: str) -> None:
+        pass
+
+    async def send_successfull_payment_email(self, email, order_id: int) -> None:
+        pass
+
+    async def send_many(self, emails) -> list[str]:
+        return []
+
+
+def report(name: str, timings: list[float], elapsed: float | None = None) -> None:
+    quantiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+    throughput = f"{len(timings) / elapsed:8.1f} req/s " if elapsed else " " * 15
+    print(
+        f"{name:<14} n={len(timings):<6} {throughput}mean={statistics.mean(timings):8.2f}ms "
+        f"p50={quantiles[49]:8.2f}ms p95={quantiles[94]:8.2f}ms p99={quantiles[98]:8.2f}ms"
+    )
+
+
+async def run_wave(name: str, items: list, request, concurrency: int) -> list:
+    """Call ``request(item)`` for every item with bounded concurrency and report the wave."""
+    semaphore = asyncio.Semaphore(concurrency)
+    timings: list[float] = []
+
+    async def one(item):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request(item)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name} failed with {response.status_code}: {response.text}")
+            return response
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(one(item) for item in items))
+    report(name, timings, time.perf_counter() - started)
+    return responses
+
+
+async def activation_tokens(emails: list[str]) -> dict[str, str]:
+    async with AsyncPostgresqlSessionLocal() as db:
+        rows = await db.execute(
+            select(UserModel.email, ActivationTokenModel.token)
+            .join(ActivationTokenModel, ActivationTokenModel.user_id == UserModel.id)
+            .where(UserModel.email.in_(emails))
+        )
+        return {email: token for email, token in rows}
+
+
+async def run_flow(client: httpx.AsyncClient, emails: list[str], region_code: str, concurrency: int) -> None:
+    await run_wave(
+        "register", emails,
+        lambda email: client.post(
+            "/api/v1/accounts/register/",
+            json={"email": email, "password": PASSWORD, "region_code": region_code}
+        ),
+        concurrency,
+    )
+
+    tokens = await activation_tokens(emails)
+    await run_wave(
+        "activate", emails,
+        lambda email: client.post("/api/v1/accounts/activate/", params={"token": tokens[email]}),
+        concurrency,
+    )
+
+    logins = await run_wave(
+        "login", emails,
+        lambda email: client.post("/api/v1/accounts/login/", json={"email": email, "password": PASSWORD}),
+        concurrency,
+    )
+    sessions = [(email, response.json()) for email, response in zip(emails, logins)]
+
+    refreshed = await run_wave(
+        "refresh", sessions,
+        lambda session: client.post(
+            "/api/v1/accounts/refresh/",
+            json={"email": session[0], "password": PASSWORD, "token": session[1]["refresh_token"]}
+        ),
+        concurrency,
+    )
+    access_tokens = [response.json()["access_token"] for response in refreshed]
+
+    await run_wave(
+        "me", access_tokens,
+        lambda token: client.get("/api/v1/accounts/me/", headers={"Authorization": f"Bearer {token}"}),
+        concurrency,
+    )
+
+
+async def run_breakdown(email: str, iterations: int) -> None:
+    settings = get_settings()
+    hasher = get_password_hasher(settings)
+    jwt_manager = get_jwt_manager(settings)
+
+    print(f"\nbreakdown (bcrypt rounds={settings.BCRYPT_ROUNDS}, {iterations} iterations, sequential)")
+    hashed = await hasher.hash(PASSWORD)
+    timings = {"bcrypt hash": [], "bcrypt verify": [], "jwt sign": [], "jwt decode": [], "refresh insert": []}
+    async with AsyncPostgresqlSessionLocal() as db:
+        user_id = await db.scalar(select(UserModel.id).where(UserModel.email == email))
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await hasher.hash(PASSWORD)
+            timings["bcrypt hash"].append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            await hasher.verify(PASSWORD, hashed)
+            timings["bcrypt verify"].append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            claims = new_refresh_token_claims(user_id)
+            token = jwt_manager.create_refresh_token(claims)
+            timings["jwt sign"].append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            jwt_manager.decode_refresh_token(token)
+            timings["jwt decode"].append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            await store_refresh_token(
+                db, user_id, token, claims["fid"],
+                expires_at=datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1),
+                max_sessions=settings.MAX_SESSIONS_PER_USER,
+            )
+            await db.commit()
+            timings["refresh insert"].append((time.perf_counter() - started) * 1000)
+
+    for name, values in timings.items():
+        report(name, values)
+
+
+async def cleanup(prefix: str) -> None:
+    async with AsyncPostgresqlSessionLocal() as db:
+        user_ids = select(UserModel.id).where(UserModel.email.like(f"{prefix}%")).scalar_subquery()
+        for model in (RefreshToken, ActivationTokenModel, PasswordResetToken):
+            await db.execute(delete(model).where(model.user_id.in_(user_ids)))
+        await db.execute(delete(UserModel).where(UserModel.email.like(f"{prefix}%")))
+        await db.commit()
+
+
+async def main(users: int, concurrency: int, region_code: str, breakdown_iterations: int) -> None:
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    emails = [f"{prefix}{i}@example.com" for i in range(users)]
+    app.dependency_overrides[get_accounts_email_notificator] = NullEmailSender
+
+    print(f"accounts flow: {users} users, concurrency {concurrency}")
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            await run_flow(client, emails, region_code, concurrency)
+        if breakdown_iterations:
+            await run_breakdown(emails[0], breakdown_iterations)
+        print("\npassword hasher:", get_password_hasher(get_settings()).stats())
+    finally:
+        app.dependency_overrides.pop(get_accounts_email_notificator, None)
+        await cleanup(prefix)
+        await postgresql_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--region-code", default="US", help="an existing region code for registration")
+    parser.add_argument("--breakdown-iterations", type=int, default=20, help="0 to skip the breakdown")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.concurrency, args.region_code, args.breakdown_iterations))
@@ -0,0 +1,123 @@
+"""
+Exercise RedisCartStore end to end: add -> remove -> movie_ids ->
+flush_dirty, checking the Postgres cart after the write-back, then time
+add/movie_ids against DatabaseCartStore. Runs once with a client that
+decodes responses and once with one that returns bytes.
+
+Uses an in-process fakeredis by default (pip install fakeredis) or a real
+server via --redis-url. Runs against the database configured in .env; the
+benchmark user and its cart are deleted afterwards:
+
+    python -m benchmarks.cart_store --iterations 200
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, insert, select
+
+from src.cart_store import CartStoreInterface, DatabaseCartStore, RedisCartStore
+from src.crud import get_cart_movie_ids
+from src.database.models.accounts import UserGroupEnum, UserGroupModel, UserModel
+from src.database.models.movies import Movie
+from src.database.models.shopping_cart import Cart, CartItem
+from src.database.session_postgres import AsyncPostgresqlSessionLocal, postgresql_engine
+
+
+def redis_client(url: str | None, decode_responses: bool):
+    if url:
+        from redis.asyncio import Redis
+
+        return Redis.from_url(url, decode_responses=decode_responses)
+    try:
+        import fakeredis
+    except ImportError:
+        raise SystemExit("Without --redis-url this benchmark needs fakeredis: pip install fakeredis")
+    return fakeredis.aioredis.FakeRedis(decode_responses=decode_responses)
+
+
+async def create_user(email: str) -> int:
+    async with AsyncPostgresqlSessionLocal() as db:
+        group_id = await db.scalar(select(UserGroupModel.id).where(UserGroupModel.name == UserGroupEnum.USER))
+        if group_id is None:
+            raise SystemExit("Needs the USER group in the database")
+        user_id = await db.scalar(
+            insert(UserModel).returning(UserModel.id),
+            [{"email": email, "_hashed_password": "-", "is_active": True, "group_id": group_id}],
+        )
+        await db.commit()
+        return user_id
+
+
+async def check_redis_store(store: RedisCartStore, user_id: int, movie_ids: list[int]) -> None:
+    async with AsyncPostgresqlSessionLocal() as db:
+        await store.clear(db, user_id)
+        for movie_id in movie_ids:
+            assert await store.add(db, user_id, movie_id), f"add {movie_id}"
+        assert not await store.add(db, user_id, movie_ids[0]), "duplicate add"
+        assert await store.remove(db, user_id, movie_ids[-1]), "remove"
+        assert not await store.remove(db, user_id, movie_ids[-1]), "second remove"
+        expected = movie_ids[:-1]
+        assert await store.movie_ids(db, user_id) == expected, "movie_ids before write-back"
+
+        flushed = await store.flush_dirty(db)
+        assert flushed == 1, f"flush_dirty wrote {flushed} carts"
+        assert sorted(await get_cart_movie_ids(db, user_id)) == sorted(expected), "Postgres after flush_dirty"
+
+        # A cart that expired from Redis is loaded back from Postgres.
+        await store._redis.delete(store._key(user_id))
+        assert sorted(await store.movie_ids(db, user_id)) == sorted(expected), "reload after expiry"
+
+
+async def time_store(name: str, store: CartStoreInterface, user_id: int, movie_ids: list[int], iterations: int) -> None:
+    async with AsyncPostgresqlSessionLocal() as db:
+        await store.clear(db, user_id)
+        started = time.perf_counter()
+        for i in range(iterations):
+            movie_id = movie_ids[i % len(movie_ids)]
+            await store.add(db, user_id, movie_id)
+            await store.movie_ids(db, user_id)
+            await store.remove(db, user_id, movie_id)
+        elapsed = time.perf_counter() - started
+        await store.clear(db, user_id)
+        await store.flush(db, user_id)
+    print(f"{name:<24} {iterations * 3 / elapsed:9.1f} ops/s  mean={elapsed / iterations / 3 * 1000:7.3f}ms")
+
+
+async def cleanup(email: str) -> None:
+    async with AsyncPostgresqlSessionLocal() as db:
+        user_ids = select(UserModel.id).where(UserModel.email == email).scalar_subquery()
+        cart_ids = select(Cart.id).where(Cart.user_id.in_(user_ids)).scalar_subquery()
+        await db.execute(delete(CartItem).where(CartItem.cart_id.in_(cart_ids)))
+        await db.execute(delete(Cart).where(Cart.user_id.in_(user_ids)))
+        await db.execute(delete(UserModel).where(UserModel.email == email))
+        await db.commit()
+
+
+async def main(iterations: int, redis_url: str | None) -> None:
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    try:
+        user_id = await create_user(email)
+        async with AsyncPostgresqlSessionLocal() as db:
+            movie_ids = list(await db.scalars(select(Movie.id).order_by(Movie.id).limit(5)))
+        if len(movie_ids) < 2:
+            raise SystemExit("Needs at least two movies in the database")
+
+        for decode_responses in (True, False):
+            store = RedisCartStore(redis_client(redis_url, decode_responses), prefix=f"bench-cart:{uuid.uuid4().hex}:")
+            await check_redis_store(store, user_id, movie_ids)
+            print(f"redis store (decode_responses={decode_responses}): add/remove/movie_ids/flush_dirty ok")
+        await time_store("redis store", store, user_id, movie_ids, iterations)
+        await time_store("database store", DatabaseCartStore(), user_id, movie_ids, iterations)
+    finally:
+        await cleanup(email)
+        await postgresql_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--redis-url", help="use a real Redis server instead of fakeredis")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.redis_url))
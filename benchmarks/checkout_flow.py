@@ -0,0 +1,157 @@
+"""
+Load-test the purchase flow in-process: add to cart -> create order ->
+confirm (checkout session) -> payment success, driven through the real
+FastAPI app with httpx's ASGI transport, one wave per endpoint.
+
+Stripe is replaced with FakePaymentGateway, so no network access or Stripe
+account is needed; --gateway-latency adds a simulated round trip to every
+gateway call. Runs against the database configured in .env. Users are
+inserted directly (no bcrypt) and deleted afterwards with everything they
+bought:
+
+    python -m benchmarks.checkout_flow --users 200 --concurrency 16 --gateway-latency 0.2
+"""
+import argparse
+import asyncio
+import uuid
+
+import httpx
+from sqlalchemy import delete, insert, select
+
+from benchmarks.accounts_flow import NullEmailSender, run_wave
+from src.config.dependencies import get_accounts_email_notificator, get_jwt_manager, get_payment_gateway
+from src.config.settings_instance import get_settings
+from src.database.models.accounts import UserGroupEnum, UserGroupModel, UserModel
+from src.database.models.movies import Movie, PurchasedMovie
+from src.database.models.orders import Order
+from src.database.models.regions import MovieRegion, Region
+from src.database.models.shopping_cart import Cart, CartItem
+from src.database.session_postgres import AsyncPostgresqlSessionLocal, postgresql_engine
+from src.main import app
+from src.payments.fake_gateway import FakePaymentGateway
+from src.utils import hash_password
+
+
+async def create_users(prefix: str, users: int, region_code: str) -> list[int]:
+    async with AsyncPostgresqlSessionLocal() as db:
+        group_id = await db.scalar(select(UserGroupModel.id).where(UserGroupModel.name == UserGroupEnum.USER))
+        region_id = await db.scalar(select(Region.id).where(Region.code == region_code))
+        if group_id is None or region_id is None:
+            raise SystemExit(f"Needs the USER group and region {region_code!r} in the database")
+        hashed_password = hash_password("Bench-Passw0rd!")
+        user_ids = await db.scalars(
+            insert(UserModel).returning(UserModel.id),
+            [
+                {
+                    "email": f"{prefix}{i}@example.com",
+                    "_hashed_password": hashed_password,
+                    "is_active": True,
+                    "group_id": group_id,
+                    "region_id": region_id,
+                }
+                for i in range(users)
+            ],
+        )
+        user_ids = list(user_ids)
+        await db.commit()
+        return user_ids
+
+
+async def available_movie_ids(region_code: str, limit: int) -> list[int]:
+    async with AsyncPostgresqlSessionLocal() as db:
+        movie_region = MovieRegion.__table__
+        movie_ids = await db.scalars(
+            select(Movie.id)
+            .join(movie_region, movie_region.c.movie_id == Movie.id)
+            .join(Region, Region.id == movie_region.c.region_id)
+            .where(Region.code == region_code)
+            .order_by(Movie.id)
+            .limit(limit)
+        )
+        movie_ids = list(movie_ids)
+    if not movie_ids:
+        raise SystemExit(f"No movies are available in region {region_code!r}")
+    return movie_ids
+
+
+async def run_flow(client: httpx.AsyncClient, headers: list[dict], movie_ids: list[int], concurrency: int) -> None:
+    carts = [(header, movie_ids[i % len(movie_ids)]) for i, header in enumerate(headers)]
+    await run_wave(
+        "cart add", carts,
+        lambda cart: client.post("/api/v1/cart/add/", json={"movie_id": cart[1]}, headers=cart[0]),
+        concurrency,
+    )
+
+    created = await run_wave(
+        "order create", headers,
+        lambda header: client.post(
+            "/api/v1/orders/create/", headers={**header, "Idempotency-Key": uuid.uuid4().hex}
+        ),
+        concurrency,
+    )
+    orders = [(header, response.json()["order_id"]) for header, response in zip(headers, created)]
+
+    confirmed = await run_wave(
+        "order confirm", orders,
+        lambda order: client.post("/api/v1/orders/confirm/", params={"order_id": order[1]}, headers=order[0]),
+        concurrency,
+    )
+    sessions = [
+        (header, response.json()["checkout_url"].rsplit("/", 1)[1])
+        for header, response in zip(headers, confirmed)
+    ]
+
+    await run_wave(
+        "pay success", sessions,
+        lambda session: client.post(
+            "/api/v1/payment/success/", params={"session_id": session[1]}, headers=session[0]
+        ),
+        concurrency,
+    )
+
+
+async def cleanup(prefix: str) -> None:
+    async with AsyncPostgresqlSessionLocal() as db:
+        user_ids = select(UserModel.id).where(UserModel.email.like(f"{prefix}%")).scalar_subquery()
+        cart_ids = select(Cart.id).where(Cart.user_id.in_(user_ids)).scalar_subquery()
+        await db.execute(delete(CartItem).where(CartItem.cart_id.in_(cart_ids)))
+        for model in (Cart, PurchasedMovie, Order):
+            await db.execute(delete(model).where(model.user_id.in_(user_ids)))
+        await db.execute(delete(UserModel).where(UserModel.email.like(f"{prefix}%")))
+        await db.commit()
+
+
+async def main(users: int, concurrency: int, region_code: str, movies: int, gateway_latency: float) -> None:
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    jwt_manager = get_jwt_manager(get_settings())
+    gateway = FakePaymentGateway(latency=gateway_latency)
+    app.dependency_overrides[get_accounts_email_notificator] = NullEmailSender
+    app.dependency_overrides[get_payment_gateway] = lambda: gateway
+
+    print(f"checkout flow: {users} users, concurrency {concurrency}, gateway latency {gateway_latency}s")
+    transport = httpx.ASGITransport(app=app)
+    try:
+        user_ids = await create_users(prefix, users, region_code)
+        headers = [
+            {"Authorization": f"Bearer {jwt_manager.create_access_token({'user_id': user_id})}"}
+            for user_id in user_ids
+        ]
+        movie_ids = await available_movie_ids(region_code, movies)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            await run_flow(client, headers, movie_ids, concurrency)
+    finally:
+        app.dependency_overrides.pop(get_accounts_email_notificator, None)
+        app.dependency_overrides.pop(get_payment_gateway, None)
+        await cleanup(prefix)
+        await postgresql_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--region-code", default="US", help="an existing region code with available movies")
+    parser.add_argument("--movies", type=int, default=20, help="distinct movies spread across the users' carts")
+    parser.add_argument("--gateway-latency", type=float, default=0.2, help="simulated seconds per gateway call")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.concurrency, args.region_code, args.movies, args.gateway_latency))
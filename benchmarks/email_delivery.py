@@ -0,0 +1,130 @@
+"""
+Measure email throughput against a local aiosmtpd server: a fresh SMTP
+connection per message (the previous behaviour) vs. EmailSender over its
+connection pool, one send_* call per message and in bulk via send_many.
+
+Needs aiosmtpd (pip install aiosmtpd); no database or mail service:
+
+    python -m benchmarks.email_delivery --messages 1000 --pool-size 4
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import aiosmtplib
+
+from src.config.settings_instance import get_settings
+from src.notifications.emails import EmailSender
+
+try:
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.smtp import AuthResult
+except ImportError:
+    raise SystemExit("This benchmark needs aiosmtpd: pip install aiosmtpd")
+
+# aiosmtpd logs a deprecation warning about its own attribute on every AUTH.
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+
+USERNAME = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+class CountingHandler:
+
+    def __init__(self) -> None:
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope) -> str:
+        self.received += 1
+        return "250 OK"
+
+
+def accept_any_login(server, session, envelope, mechanism, auth_data) -> AuthResult:
+    return AuthResult(success=True)
+
+
+def build_sender(hostname: str, port: int, pool_size: int, max_messages: int) -> EmailSender:
+    settings = get_settings()
+    return EmailSender(
+        hostname=hostname,
+        port=port,
+        email=USERNAME,
+        password=PASSWORD,
+        use_tls=False,
+        template_dir=settings.PATH_TO_EMAIL_TEMPLATES_DIR,
+        activation_email_template_name=settings.ACTIVATION_EMAIL_TEMPLATE_NAME,
+        activation_email_complete_template_name=settings.ACTIVATION_EMAIL_COMPLETE_TEMPLATE_NAME,
+        password_reset_email_request_template_name=settings.PASSWORD_RESET_TEMLATE_NAME,
+        password_reset_email_complete_template_name=settings.PASSWORD_RESET_COMPLETE_TEMLATE_NAME,
+        password_change_email_complete_template_name=settings.PASSWORD_CHANGE_COMPLETE_TEMLATE_NAME,
+        successfull_payment_email_template_name=settings.SUCCESSFULL_PAYMENT_EMAIL_TEMPLATE_NAME,
+        pool_size=pool_size,
+        max_messages_per_connection=max_messages,
+    )
+
+
+async def send_unpooled(sender: EmailSender, hostname: str, port: int, recipient: str) -> None:
+    message = sender._build_message(recipient, "Payment Successful", "<p>Thanks!</p>")
+    smtp = aiosmtplib.SMTP(hostname=hostname, port=port, start_tls=False)
+    await smtp.connect()
+    await smtp.login(USERNAME, PASSWORD)
+    await smtp.send_message(message)
+    await smtp.quit()
+
+
+async def run(name: str, handler: CountingHandler, count: int, send) -> None:
+    before = handler.received
+    started = time.perf_counter()
+    await send()
+    elapsed = time.perf_counter() - started
+    delivered = handler.received - before
+    print(f"{name:<22} delivered={delivered:<6} {delivered / elapsed:9.1f} msg/s  total={elapsed:6.2f}s")
+    assert delivered == count, f"{name}: expected {count} messages, server got {delivered}"
+
+
+async def main(messages: int, pool_size: int, max_messages: int, port: int) -> None:
+    handler = CountingHandler()
+    hostname = "127.0.0.1"
+    controller = Controller(
+        handler, hostname=hostname, port=port,
+        authenticator=accept_any_login, auth_require_tls=False
+    )
+    controller.start()
+    sender = build_sender(hostname, port, pool_size, max_messages)
+    recipients = [f"user{i}@example.com" for i in range(messages)]
+    semaphore = asyncio.Semaphore(pool_size)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            await coroutine
+
+    print(f"{messages} messages, pool size {pool_size}, {max_messages} messages per connection")
+    try:
+        await run("connection per message", handler, messages, lambda: asyncio.gather(*(
+            bounded(send_unpooled(sender, hostname, port, recipient)) for recipient in recipients
+        )))
+        await run("pooled send_*", handler, messages, lambda: asyncio.gather(*(
+            sender.send_successfull_payment_email(recipient, order_id=i) for i, recipient in enumerate(recipients)
+        )))
+        failed = []
+
+        async def bulk():
+            failed.extend(await sender.send_many(
+                (recipient, "Payment Successful", "<p>Thanks!</p>") for recipient in recipients
+            ))
+        await run("send_many", handler, messages, bulk)
+        assert not failed, f"send_many reported failures: {failed[:5]}"
+    finally:
+        await sender.close()
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--max-messages-per-connection", type=int, default=100)
+    parser.add_argument("--port", type=int, default=2525, help="port for the local aiosmtpd server")
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.pool_size, args.max_messages_per_connection, args.port))
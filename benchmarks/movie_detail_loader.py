@@ -0,0 +1,86 @@
+"""
+Compare the json_agg movie loader with the selectinload path it replaced.
+
+Runs against the database configured in .env:
+
+    python -m benchmarks.movie_detail_loader --iterations 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from src.crud import get_movie_retrieve
+from src.database.models.movies import Movie
+from src.database.session_postgres import AsyncPostgresqlSessionLocal, postgresql_engine
+from src.schemas.movies import MovieRetrieve
+
+
+async def load_with_selectinload(db, movie_id: int) -> MovieRetrieve:
+    stmt = select(Movie).options(
+        selectinload(Movie.certification),
+        selectinload(Movie.genres),
+        selectinload(Movie.directors),
+        selectinload(Movie.stars),
+        selectinload(Movie.regions)
+    ).where(Movie.id == movie_id)
+    result = await db.execute(stmt)
+    return MovieRetrieve.model_validate(result.scalar_one())
+
+
+async def load_with_json_agg(db, movie_id: int) -> MovieRetrieve:
+    return await get_movie_retrieve(db, movie_id)
+
+
+async def measure(loader, movie_ids: list[int], iterations: int) -> list[float]:
+    timings = []
+    for i in range(iterations):
+        movie_id = movie_ids[i % len(movie_ids)]
+        async with AsyncPostgresqlSessionLocal() as db:
+            started = time.perf_counter()
+            await loader(db, movie_id)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    quantiles = statistics.quantiles(timings, n=100)
+    print(
+        f"{name:<14} n={len(timings):<6} mean={statistics.mean(timings):7.2f}ms "
+        f"p50={quantiles[49]:7.2f}ms p95={quantiles[94]:7.2f}ms p99={quantiles[98]:7.2f}ms"
+    )
+
+
+async def main(iterations: int, sample: int) -> None:
+    async with AsyncPostgresqlSessionLocal() as db:
+        movie_ids = (await db.scalars(select(Movie.id).order_by(Movie.id).limit(sample))).all()
+    if not movie_ids:
+        raise SystemExit("No movies in the database, nothing to benchmark.")
+
+    for movie_id in movie_ids:
+        async with AsyncPostgresqlSessionLocal() as db:
+            expected = await load_with_selectinload(db, movie_id)
+            actual = await load_with_json_agg(db, movie_id)
+        key = lambda item: item.id
+        for field in ("genres", "directors", "stars", "regions"):
+            setattr(expected, field, sorted(getattr(expected, field), key=key))
+        assert expected == actual, f"Loaders disagree for movie {movie_id}"
+
+    # Warm up the pool and the prepared statement cache before timing.
+    await measure(load_with_selectinload, movie_ids, 20)
+    await measure(load_with_json_agg, movie_ids, 20)
+
+    report("selectinload", await measure(load_with_selectinload, movie_ids, iterations))
+    report("json_agg", await measure(load_with_json_agg, movie_ids, iterations))
+    await postgresql_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--sample", type=int, default=50, help="number of distinct movies to cycle through")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.sample))
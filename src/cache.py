@@ -0,0 +1,279 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+from pydantic import ValidationError
+from redis.exceptions import WatchError
+
+from src.schemas.movies import MovieRetrieve
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self._ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackendInterface(ABC):
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        """Return the cached value for ``key`` or None on a miss."""
+        pass
+
+    @abstractmethod
+    async def get_many(self, keys: list[str]) -> list[str | None]:
+        """Return cached values for ``keys`` in the same order, None for misses."""
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: str) -> None:
+        pass
+
+    @abstractmethod
+    async def set_many(self, items: dict[str, str]) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    @abstractmethod
+    async def invalidate(self, keys: list[str], hold: float) -> None:
+        """Delete ``keys`` and have ``set_many_if_valid`` skip them for the next ``hold`` seconds."""
+        pass
+
+    @abstractmethod
+    async def set_many_if_valid(self, items: dict[str, str]) -> None:
+        """
+        Like ``set_many``, but atomically skips keys invalidated within their
+        hold period, so a value read before a write cannot be cached after
+        the write's invalidation.
+        """
+        pass
+
+
+class InMemoryCacheBackend(CacheBackendInterface):
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._maxsize = maxsize
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._held_until: dict[str, float] = {}
+
+    async def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    async def get_many(self, keys: list[str]) -> list[str | None]:
+        return [self._cache.get(key) for key in keys]
+
+    async def set(self, key: str, value: str) -> None:
+        self._cache.set(key, value)
+
+    async def set_many(self, items: dict[str, str]) -> None:
+        for key, value in items.items():
+            self._cache.set(key, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+    async def invalidate(self, keys: list[str], hold: float) -> None:
+        now = time.monotonic()
+        if len(self._held_until) > self._maxsize:
+            self._held_until = {key: until for key, until in self._held_until.items() if until > now}
+        for key in keys:
+            self._held_until[key] = now + hold
+            self._cache.delete(key)
+
+    async def set_many_if_valid(self, items: dict[str, str]) -> None:
+        now = time.monotonic()
+        for key, value in items.items():
+            if self._held_until.get(key, 0) <= now:
+                self._cache.set(key, value)
+
+
+class RedisCacheBackend(CacheBackendInterface):
+
+    def __init__(self, url: str, ttl: int) -> None:
+        from redis.asyncio import Redis
+
+        self._redis = Redis.from_url(url, decode_responses=True)
+        self._ttl = ttl
+
+    async def get(self, key: str) -> str | None:
+        return await self._redis.get(key)
+
+    async def get_many(self, keys: list[str]) -> list[str | None]:
+        if not keys:
+            return []
+        return await self._redis.mget(keys)
+
+    async def set(self, key: str, value: str) -> None:
+        await self._redis.set(key, value, ex=self._ttl)
+
+    async def set_many(self, items: dict[str, str]) -> None:
+        if not items:
+            return
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, ex=self._ttl)
+            await pipe.execute()
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._redis.delete(*keys)
+
+    @staticmethod
+    def _hold_key(key: str) -> str:
+        return f"{key}:invalidated"
+
+    async def invalidate(self, keys: list[str], hold: float) -> None:
+        if not keys:
+            return
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for key in keys:
+                pipe.set(self._hold_key(key), 1, px=max(int(hold * 1000), 1))
+            pipe.delete(*keys)
+            await pipe.execute()
+
+    async def set_many_if_valid(self, items: dict[str, str]) -> None:
+        if not items:
+            return
+        hold_keys = [self._hold_key(key) for key in items]
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                # An invalidation between reading the holds and writing
+                # aborts the transaction; the values are simply not cached.
+                await pipe.watch(*hold_keys)
+                held = await pipe.mget(hold_keys)
+                pipe.multi()
+                for (key, value), is_held in zip(items.items(), held):
+                    if is_held is None:
+                        pipe.set(key, value, ex=self._ttl)
+                await pipe.execute()
+            except WatchError:
+                pass
+
+
+class MovieCache:
+    """
+    Read-through cache of serialized ``MovieRetrieve`` payloads keyed by movie id.
+
+    Backend failures are logged and treated as misses so a cache outage
+    degrades to the database path instead of failing requests. So are
+    payloads that no longer validate against ``MovieRetrieve``.
+
+    An invalidated movie is not cached again for ``invalidation_hold``
+    seconds. A request that read the row before the write committed could
+    otherwise put the old data back right after the invalidation, where it
+    would stay for the whole TTL.
+    """
+
+    # Bump whenever MovieRetrieve changes incompatibly, so entries written by
+    # the previous release are never read.
+    SCHEMA_VERSION = 2
+
+    def __init__(
+        self, backend: CacheBackendInterface, prefix: str = "movie:", invalidation_hold: float = 10
+    ) -> None:
+        self._backend = backend
+        self._invalidation_hold = invalidation_hold
+        self._prefix = f"{prefix}v{self.SCHEMA_VERSION}:"
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def _key(self, movie_id: int) -> str:
+        return f"{self._prefix}{movie_id}"
+
+    async def get_many(self, movie_ids: list[int]) -> dict[int, MovieRetrieve]:
+        try:
+            values = await self._backend.get_many([self._key(movie_id) for movie_id in movie_ids])
+        except Exception as error:
+            self.errors += 1
+            logging.warning(f"Movie cache read failed: {error}")
+            values = [None] * len(movie_ids)
+
+        found = {}
+        for movie_id, value in zip(movie_ids, values):
+            if value is None:
+                continue
+            try:
+                found[movie_id] = MovieRetrieve.model_validate_json(value)
+            except ValidationError as error:
+                self.errors += 1
+                logging.warning(
+                    f"Discarding movie cache entry {self._key(movie_id)}: "
+                    f"{error.error_count()} validation errors"
+                )
+        self.hits += len(found)
+        self.misses += len(movie_ids) - len(found)
+        return found
+
+    async def get(self, movie_id: int) -> MovieRetrieve | None:
+        return (await self.get_many([movie_id])).get(movie_id)
+
+    async def set(self, movie: MovieRetrieve) -> None:
+        await self.set_many([movie])
+
+    async def set_many(self, movies: Iterable[MovieRetrieve]) -> None:
+        items = {self._key(movie.id): movie.model_dump_json() for movie in movies}
+        if not items:
+            return
+        try:
+            await self._backend.set_many_if_valid(items)
+        except Exception as error:
+            self.errors += 1
+            logging.warning(f"Movie cache write failed: {error}")
+
+    async def invalidate(self, movie_ids: Iterable[int]) -> None:
+        keys = [self._key(movie_id) for movie_id in set(movie_ids)]
+        if not keys:
+            return
+        try:
+            await self._backend.invalidate(keys, hold=self._invalidation_hold)
+            self.invalidations += len(keys)
+        except Exception as error:
+            self.errors += 1
+            logging.error(f"Movie cache invalidation failed for {keys}: {error}")
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self._backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
@@ -0,0 +1,210 @@
+import time
+from abc import ABC, abstractmethod
+
+from redis.exceptions import WatchError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud import delete_cart_item, get_cart_movie_ids, insert_cart_item, replace_cart_items
+
+
+class CartStoreInterface(ABC):
+    """
+    Where shopping carts live while users edit them. The ``carts`` and
+    ``cart_items`` tables stay the system of record for orders: ``flush``
+    brings them up to date for one user before they are read.
+    """
+
+    @abstractmethod
+    async def add(self, db: AsyncSession, user_id: int, movie_id: int) -> bool:
+        """Add a movie to the cart. Returns False if it was already there."""
+        pass
+
+    @abstractmethod
+    async def remove(self, db: AsyncSession, user_id: int, movie_id: int) -> bool:
+        """Remove a movie from the cart. Returns False if it was not there."""
+        pass
+
+    @abstractmethod
+    async def clear(self, db: AsyncSession, user_id: int) -> None:
+        pass
+
+    @abstractmethod
+    async def movie_ids(self, db: AsyncSession, user_id: int) -> list[int]:
+        """Movie ids in the cart, oldest first."""
+        pass
+
+    @abstractmethod
+    async def flush(self, db: AsyncSession, user_id: int) -> None:
+        """Write the user's cart to the cart tables and commit."""
+        pass
+
+
+class DatabaseCartStore(CartStoreInterface):
+    """Reads and writes the cart tables directly, committing every change."""
+
+    async def add(self, db: AsyncSession, user_id: int, movie_id: int) -> bool:
+        added = await insert_cart_item(db, user_id, movie_id)
+        await db.commit()
+        return added
+
+    async def remove(self, db: AsyncSession, user_id: int, movie_id: int) -> bool:
+        removed = await delete_cart_item(db, user_id, movie_id)
+        await db.commit()
+        return removed
+
+    async def clear(self, db: AsyncSession, user_id: int) -> None:
+        await replace_cart_items(db, user_id, [])
+        await db.commit()
+
+    async def movie_ids(self, db: AsyncSession, user_id: int) -> list[int]:
+        return await get_cart_movie_ids(db, user_id)
+
+    async def flush(self, db: AsyncSession, user_id: int) -> None:
+        pass
+
+
+class RedisCartStore(CartStoreInterface):
+    """
+    Keeps each cart in a Redis sorted set of movie ids scored by the time
+    they were added. The TTL is renewed on every change. Changes mark the
+    user as dirty; ``flush_dirty`` (run periodically by Celery) and
+    ``flush`` write dirty carts back to Postgres.
+
+    A cart missing from Redis is loaded from Postgres on first access. A
+    sentinel member marks a set as loaded, so an empty cart is still
+    distinguishable from one that expired. Changes are applied only while
+    the sentinel is present; a key without it is replaced on the next load.
+    """
+
+    LOADED = "loaded"
+    # Load-and-change rounds before giving up, e.g. while the cart keeps
+    # expiring or being changed concurrently.
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, redis, ttl: int = 7 * 24 * 3600, prefix: str = "cart:") -> None:
+        self._redis = redis
+        self._ttl = ttl
+        self._prefix = prefix
+        self._dirty_key = f"{prefix}dirty"
+
+    @classmethod
+    def from_url(cls, url: str, ttl: int) -> "RedisCartStore":
+        from redis.asyncio import Redis
+
+        return cls(Redis.from_url(url, decode_responses=True), ttl=ttl)
+
+    def _key(self, user_id: int) -> str:
+        return f"{self._prefix}{user_id}"
+
+    async def _load(self, db: AsyncSession, user_id: int) -> None:
+        key = self._key(user_id)
+        if await self._redis.zscore(key, self.LOADED) is not None:
+            return
+        movie_ids = await get_cart_movie_ids(db, user_id)
+        members = {self.LOADED: 0, **{str(movie_id): i + 1 for i, movie_id in enumerate(movie_ids)}}
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                # Write the set only if no concurrent request has loaded or
+                # changed the cart meanwhile. A key without the sentinel is
+                # not a loaded cart and is replaced.
+                await pipe.watch(key)
+                if await pipe.zscore(key, self.LOADED) is not None:
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                pipe.zadd(key, members)
+                pipe.expire(key, self._ttl)
+                await pipe.execute()
+            except WatchError:
+                pass
+
+    async def _change(self, db: AsyncSession, user_id: int, operation) -> int:
+        key = self._key(user_id)
+        for _ in range(self.MAX_ATTEMPTS):
+            await self._load(db, user_id)
+            async with self._redis.pipeline(transaction=True) as pipe:
+                try:
+                    # Apply the change only to a loaded cart, so a cart that
+                    # expired after loading is reloaded instead of recreated
+                    # without its Postgres contents.
+                    await pipe.watch(key)
+                    if await pipe.zscore(key, self.LOADED) is None:
+                        continue
+                    pipe.multi()
+                    pipe.expire(key, self._ttl)
+                    operation(pipe, key)
+                    pipe.sadd(self._dirty_key, user_id)
+                    _, result, _ = await pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+        raise RuntimeError(f"Could not change cart of user {user_id} after {self.MAX_ATTEMPTS} attempts")
+
+    async def add(self, db: AsyncSession, user_id: int, movie_id: int) -> bool:
+        added = await self._change(
+            db, user_id, lambda pipe, key: pipe.zadd(key, {str(movie_id): time.time()}, nx=True)
+        )
+        return added == 1
+
+    async def remove(self, db: AsyncSession, user_id: int, movie_id: int) -> bool:
+        removed = await self._change(db, user_id, lambda pipe, key: pipe.zrem(key, str(movie_id)))
+        return removed == 1
+
+    async def clear(self, db: AsyncSession, user_id: int) -> None:
+        key = self._key(user_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.zadd(key, {self.LOADED: 0})
+            pipe.expire(key, self._ttl)
+            pipe.sadd(self._dirty_key, user_id)
+            await pipe.execute()
+
+    async def _cached_movie_ids(self, user_id: int) -> list[int] | None:
+        members = await self._redis.zrange(self._key(user_id), 0, -1)
+        # Clients built without decode_responses return bytes.
+        if not members or members[0] not in (self.LOADED, self.LOADED.encode()):
+            return None
+        return [int(member) for member in members[1:]]
+
+    async def movie_ids(self, db: AsyncSession, user_id: int) -> list[int]:
+        for _ in range(self.MAX_ATTEMPTS):
+            await self._load(db, user_id)
+            movie_ids = await self._cached_movie_ids(user_id)
+            if movie_ids is not None:
+                return movie_ids
+        raise RuntimeError(f"Could not load cart of user {user_id} after {self.MAX_ATTEMPTS} attempts")
+
+    async def _write_back(self, db: AsyncSession, user_ids: list[int]) -> None:
+        for user_id in user_ids:
+            movie_ids = await self._cached_movie_ids(user_id)
+            # An expired cart has nothing newer than Postgres to write.
+            if movie_ids is not None:
+                await replace_cart_items(db, user_id, movie_ids)
+        await db.commit()
+
+    async def flush(self, db: AsyncSession, user_id: int) -> None:
+        # Clear the mark before reading, so a change made while writing marks
+        # the cart dirty again instead of being lost.
+        if not await self._redis.srem(self._dirty_key, user_id):
+            return
+        try:
+            await self._write_back(db, [user_id])
+        except Exception:
+            await db.rollback()
+            await self._redis.sadd(self._dirty_key, user_id)
+            raise
+
+    async def flush_dirty(self, db: AsyncSession, batch_size: int = 100) -> int:
+        """Write every dirty cart back to Postgres, one commit per batch. Returns the number written."""
+        flushed = 0
+        while True:
+            user_ids = [int(user_id) for user_id in await self._redis.spop(self._dirty_key, batch_size)]
+            if not user_ids:
+                return flushed
+            try:
+                await self._write_back(db, user_ids)
+            except Exception:
+                await db.rollback()
+                await self._redis.sadd(self._dirty_key, *user_ids)
+                raise
+            flushed += len(user_ids)
@@ -1,7 +1,12 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
-from src.celery_scheduler.tasks import celery_delete_expired_tokens
+from celery.signals import worker_process_init
+from src.celery_scheduler.tasks import (
+    EMAIL_DEAD_LETTER_QUEUE, celery_delete_expired_tokens, celery_reconcile_movie_ratings,
+    celery_sync_carts, get_worker_email_sender
+)
+from src.config.settings_instance import get_settings
 
 
 celery = Celery(
@@ -12,9 +17,26 @@ celery = Celery(
 
 celery.autodiscover_tasks(["src.tasks"])
 
+celery.conf.task_routes = {
+    'src.celery_scheduler.tasks.celery_email_dead_letter': {'queue': EMAIL_DEAD_LETTER_QUEUE},
+}
+
+
+@worker_process_init.connect
+def warm_up_email_sender(**kwargs):
+    get_worker_email_sender().load_templates()
+
 celery.conf.beat_schedule = {
     'delete-expired-tokens-every-hour': {
         'task': 'src.celery_scheduler.tasks.celery_delete_expired_tokens',
-        'schedule': crontab(hour="*/1"),
+        'schedule': crontab(minute=0),
+    },
+    'sync-carts': {
+        'task': 'src.celery_scheduler.tasks.celery_sync_carts',
+        'schedule': get_settings().CART_SYNC_INTERVAL,
+    },
+    'reconcile-movie-ratings-daily': {
+        'task': 'src.celery_scheduler.tasks.celery_reconcile_movie_ratings',
+        'schedule': crontab(hour=3, minute=0),
     },
 }
@@ -1,10 +1,146 @@
-from celery import shared_task
-from src.database.session_sqlite import SessionLocal
-from src.crud import delete_expired_tokens
+import asyncio
+import logging
+
+from celery import Task, current_app, shared_task
+from celery.utils.time import get_exponential_backoff_interval
+from src.config.settings_instance import get_settings
+from src.cart_store import RedisCartStore
+from src.database.session_postgres import AsyncPostgresqlSessionLocal, SyncPostgresqlSessionLocal
+from src.crud import delete_expired_tokens, reconcile_movie_ratings
+from src.exceptions.emails import BaseEmailError
+from src.notifications.emails import EmailSender
+
+settings = get_settings()
+
+EMAIL_DEAD_LETTER_QUEUE = "email.dead_letter"
+EMAIL_METHODS = frozenset({
+    "send_activation_email",
+    "send_activation_complete_email",
+    "send_password_reset_email",
+    "send_password_reset_complete_email",
+    "send_password_change_complete_email",
+    "send_successfull_payment_email",
+})
+
+_email_sender: EmailSender | None = None
+_cart_store: RedisCartStore | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_worker_email_sender() -> EmailSender:
+    global _email_sender
+    if _email_sender is None:
+        _email_sender = EmailSender.from_settings(settings)
+    return _email_sender
+
+
+def get_worker_cart_store() -> RedisCartStore:
+    global _cart_store
+    if _cart_store is None:
+        _cart_store = RedisCartStore.from_url(settings.REDIS_URL, ttl=settings.CART_TTL)
+    return _cart_store
+
+
+def _run_async(coroutine):
+    # One long-lived loop per worker process, so pooled SMTP connections
+    # survive from one task to the next.
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coroutine)
+
+
+class EmailTask(Task):
+    """
+    Parks emails that exhausted their retries on the dead-letter queue. Other
+    errors (unknown method, template errors) would fail again on replay, so
+    they are logged and dropped.
+    """
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        if not isinstance(exc, BaseEmailError):
+            logging.error(f"Email task {task_id} failed and was dropped: {exc!r}")
+            return
+        logging.error(f"Email task {task_id} failed permanently: {exc!r}")
+        celery_email_dead_letter.apply_async(
+            args=[self.name, list(args), kwargs, repr(exc)],
+            queue=EMAIL_DEAD_LETTER_QUEUE
+        )
 
 
 @shared_task
 def celery_delete_expired_tokens():
-    with SessionLocal() as db:
-        delete_expired_tokens(db)
+    with SyncPostgresqlSessionLocal() as db:
+        purged = delete_expired_tokens(db, batch_size=settings.TOKEN_CLEANUP_BATCH_SIZE)
+    logging.info(f"Purged expired tokens: {purged}")
+    return purged
+
+
+@shared_task
+def celery_reconcile_movie_ratings():
+    with SyncPostgresqlSessionLocal() as db:
+        return reconcile_movie_ratings(db)
+
+
+async def _sync_carts() -> int:
+    async with AsyncPostgresqlSessionLocal() as db:
+        return await get_worker_cart_store().flush_dirty(db)
+
+
+@shared_task
+def celery_sync_carts():
+    if settings.CART_STORE_BACKEND != "redis":
+        return 0
+    return _run_async(_sync_carts())
+
+
+# rate_limit applies per worker process; each worker talks to the single
+# configured SMTP host, so it caps what one worker sends to that host.
+email_task_options = dict(
+    base=EmailTask,
+    acks_late=True,
+    autoretry_for=(BaseEmailError,),
+    retry_backoff=settings.EMAIL_TASK_RETRY_BACKOFF,
+    retry_backoff_max=settings.EMAIL_TASK_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    max_retries=settings.EMAIL_TASK_MAX_RETRIES,
+    rate_limit=settings.EMAIL_TASK_RATE_LIMIT,
+)
+
+
+@shared_task(**email_task_options)
+def celery_send_email(method: str, *args):
+    if method not in EMAIL_METHODS:
+        raise ValueError(f"Unknown email method: {method}")
+    _run_async(getattr(get_worker_email_sender(), method)(*args))
+
+
+@shared_task(bind=True, **email_task_options)
+def celery_send_email_batch(self, emails: list):
+    failed = set(_run_async(get_worker_email_sender().send_many(tuple(email) for email in emails)))
+    if failed:
+        # Retry only the recipients that failed. An explicit retry does not go
+        # through autoretry_for, so apply the same backoff and jitter here.
+        remaining = [email for email in emails if email[0] in failed]
+        raise self.retry(
+            args=[remaining],
+            exc=BaseEmailError(f"{len(remaining)} emails failed"),
+            countdown=get_exponential_backoff_interval(
+                factor=settings.EMAIL_TASK_RETRY_BACKOFF,
+                retries=self.request.retries,
+                maximum=settings.EMAIL_TASK_RETRY_BACKOFF_MAX,
+                full_jitter=True,
+            ),
+        )
+
+
+@shared_task
+def celery_email_dead_letter(task_name: str, args: list, kwargs: dict, error: str):
+    """
+    Routed to EMAIL_DEAD_LETTER_QUEUE, which regular workers do not consume,
+    so failed emails stay in the broker. To replay them once SMTP is healthy:
 
+        celery -A src.celery_scheduler.celery worker -Q email.dead_letter
+    """
+    logging.warning(f"Replaying dead-lettered {task_name} (last error: {error})")
+    current_app.send_task(task_name, args=args, kwargs=kwargs)
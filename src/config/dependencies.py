@@ -2,12 +2,22 @@ from typing import Callable, Iterable
 from fastapi import Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-import stripe
+from src.cache import InMemoryCacheBackend, MovieCache, RedisCacheBackend, TTLCache
+from src.cart_store import CartStoreInterface, DatabaseCartStore, RedisCartStore
+from src.crud import get_user_by_id
 from src.database.models.orders import Order, OrderItem, OrderStatus
+from src.exceptions.payment import PaymentGatewayError, PaymentGatewayUnavailableError
 from src.exceptions.token import TokenExpiredError, InvalidTokenError
+from src.instrumentation.middleware import Instrumentation
 from src.database.models.accounts import UserGroupEnum, UserModel
-from src.notifications.emails import EmailSender, EmailSenderInterface
+from src.notifications.interfaces import EmailSenderInterface
+from src.notifications.queue import QueuedEmailSender
+from src.payments.circuit_breaker import CircuitBreaker
+from src.payments.fake_gateway import FakePaymentGateway
+from src.payments.interfaces import CheckoutLineItem, PaymentGatewayInterface
+from src.payments.stripe_gateway import StripePaymentGateway
 from src.config.settings import BaseAppSettings
+from src.security.passwords import PasswordHasher
 from src.security.token_manager import JWTTokenManager
 from fastapi.security import OAuth2PasswordBearer
 from src.schemas.accounts import UserRetrieveSchema
@@ -15,32 +25,173 @@ from src.database.session_postgres import get_postgresql_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.config.settings_instance import get_settings
 
-def get_accounts_email_notificator(
-    settings: BaseAppSettings = Depends(get_settings)
-) -> EmailSenderInterface:
-
-    return EmailSender(
-        hostname=settings.EMAIL_HOST,
-        port=settings.EMAIL_PORT,
-        email=settings.EMAIL_HOST_USER,
-        password=settings.EMAIL_HOST_PASSWORD,
-        use_tls=settings.EMAIL_USE_TLS,
-        template_dir=settings.PATH_TO_EMAIL_TEMPLATES_DIR,
-        activation_email_template_name=settings.ACTIVATION_EMAIL_TEMPLATE_NAME,
-        activation_email_complete_template_name=settings.ACTIVATION_EMAIL_COMPLETE_TEMPLATE_NAME,
-        password_reset_email_request_template_name=settings.PASSWORD_RESET_TEMLATE_NAME,
-        password_reset_email_complete_template_name=settings.PASSWORD_RESET_COMPLETE_TEMLATE_NAME,
-        password_change_email_complete_template_name=settings.PASSWORD_CHANGE_COMPLETE_TEMLATE_NAME,
-        successfull_payment_email_template_name=settings.SUCCESSFULL_PAYMENT_EMAIL_TEMPLATE_NAME
-    )
+_email_sender: EmailSenderInterface | None = None
+
+
+def get_accounts_email_notificator() -> EmailSenderInterface:
+    # Emails are delivered by the Celery worker; the web tier only enqueues.
+    global _email_sender
+    if _email_sender is None:
+        _email_sender = QueuedEmailSender()
+    return _email_sender
+
+_jwt_manager: JWTTokenManager | None = None
+
 
 def get_jwt_manager(
         settings: BaseAppSettings = Depends(get_settings)
 ) -> JWTTokenManager:
-    return JWTTokenManager(
-        secret_key_access=settings.SECRET_KEY_ACCESS,
-        secret_key_refresh=settings.SECRET_KEY_REFRESH,
-        algorithm=settings.JWT_SIGNING_ALGORITHM
+    global _jwt_manager
+    if _jwt_manager is None:
+        _jwt_manager = JWTTokenManager(
+            secret_key_access=settings.SECRET_KEY_ACCESS,
+            secret_key_refresh=settings.SECRET_KEY_REFRESH,
+            algorithm=settings.JWT_SIGNING_ALGORITHM
+        )
+    return _jwt_manager
+
+_password_hasher: PasswordHasher | None = None
+
+
+def get_password_hasher(
+    settings: BaseAppSettings = Depends(get_settings)
+) -> PasswordHasher:
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher(
+            rounds=settings.BCRYPT_ROUNDS,
+            max_workers=settings.PASSWORD_HASHER_WORKERS,
+            max_pending=settings.PASSWORD_HASHER_MAX_PENDING
+        )
+    return _password_hasher
+
+_movie_cache: MovieCache | None = None
+
+
+def get_movie_cache(
+    settings: BaseAppSettings = Depends(get_settings)
+) -> MovieCache:
+    global _movie_cache
+    if _movie_cache is None:
+        if settings.MOVIE_CACHE_BACKEND == "redis":
+            backend = RedisCacheBackend(settings.REDIS_URL, ttl=settings.MOVIE_CACHE_TTL)
+        else:
+            backend = InMemoryCacheBackend(
+                maxsize=settings.MOVIE_CACHE_MAXSIZE,
+                ttl=settings.MOVIE_CACHE_TTL
+            )
+        _movie_cache = MovieCache(backend, invalidation_hold=settings.MOVIE_CACHE_INVALIDATION_HOLD)
+    return _movie_cache
+
+_movie_summary_cache: TTLCache | None = None
+
+
+def get_movie_summary_cache() -> TTLCache:
+    """
+    Totals and facets of unsearched movie lists, keyed by their filters.
+    Cleared whenever a movie or genre changes.
+    """
+    global _movie_summary_cache
+    if _movie_summary_cache is None:
+        _movie_summary_cache = TTLCache(maxsize=256, ttl=60)
+    return _movie_summary_cache
+
+_cart_store: CartStoreInterface | None = None
+
+
+def get_cart_store(
+    settings: BaseAppSettings = Depends(get_settings)
+) -> CartStoreInterface:
+    global _cart_store
+    if _cart_store is None:
+        if settings.CART_STORE_BACKEND == "redis":
+            _cart_store = RedisCartStore.from_url(settings.REDIS_URL, ttl=settings.CART_TTL)
+        else:
+            _cart_store = DatabaseCartStore()
+    return _cart_store
+
+
+_payment_gateway: PaymentGatewayInterface | None = None
+
+
+def get_payment_gateway(
+    settings: BaseAppSettings = Depends(get_settings)
+) -> PaymentGatewayInterface:
+    global _payment_gateway
+    if _payment_gateway is None:
+        if settings.PAYMENT_GATEWAY_BACKEND == "fake":
+            _payment_gateway = FakePaymentGateway(latency=settings.FAKE_PAYMENT_LATENCY)
+        else:
+            _payment_gateway = StripePaymentGateway(
+                api_key=settings.STRIPE_API_KEY,
+                timeout=settings.STRIPE_TIMEOUT,
+                connect_timeout=settings.STRIPE_CONNECT_TIMEOUT,
+                max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+                circuit_breaker=CircuitBreaker(
+                    "stripe",
+                    failure_threshold=settings.PAYMENT_CIRCUIT_FAILURE_THRESHOLD,
+                    reset_timeout=settings.PAYMENT_CIRCUIT_RESET_TIMEOUT,
+                ),
+            )
+    return _payment_gateway
+
+
+_instrumentation: Instrumentation | None = None
+
+
+def get_instrumentation(
+    settings: BaseAppSettings = Depends(get_settings)
+) -> Instrumentation:
+    global _instrumentation
+    if _instrumentation is None:
+        _instrumentation = Instrumentation(
+            n_plus_one_threshold=settings.INSTRUMENTATION_N_PLUS_ONE_THRESHOLD,
+            profiling_enabled=settings.INSTRUMENTATION_PROFILING_ENABLED,
+            profile_interval=settings.INSTRUMENTATION_PROFILE_INTERVAL,
+            access_token=settings.INSTRUMENTATION_TOKEN,
+        )
+    return _instrumentation
+
+
+_user_principal_cache: TTLCache | None = None
+
+
+def get_user_principal_cache(
+    settings: BaseAppSettings = Depends(get_settings)
+) -> TTLCache:
+    """
+    Per-process cache of UserRetrieveSchema by user id. Entries are dropped
+    explicitly when a user's password, status or group changes; the short
+    TTL bounds staleness across processes.
+    """
+    global _user_principal_cache
+    if _user_principal_cache is None:
+        _user_principal_cache = TTLCache(
+            maxsize=settings.USER_PRINCIPAL_CACHE_MAXSIZE,
+            ttl=settings.USER_PRINCIPAL_CACHE_TTL
+        )
+    return _user_principal_cache
+
+def _build_user_principal(user: UserModel) -> UserRetrieveSchema:
+    return UserRetrieveSchema(
+        id=user.id,
+        email=user.email,
+        is_active=user.is_active,
+        created_at=user.created_at,
+        updated_at=user.updated_at,
+        group=UserGroupEnum(user.group.name),
+        region=user.region
+    )
+
+
+def _access_token_claims_match(payload: dict, user: UserRetrieveSchema) -> bool:
+    # Tokens issued before claims were embedded carry only user_id.
+    if "group" not in payload:
+        return True
+    return (
+        payload.get("group") == UserGroupEnum(user.group).value
+        and payload.get("region") == (user.region.code if user.region else None)
+        and payload.get("is_active") == user.is_active
     )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -48,7 +199,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_postgresql_db),
-    jwt_manager: JWTTokenManager = Depends(get_jwt_manager)
+    jwt_manager: JWTTokenManager = Depends(get_jwt_manager),
+    principal_cache: TTLCache = Depends(get_user_principal_cache)
 ) -> UserRetrieveSchema:
     try:
         payload = jwt_manager.decode_access_token(token)
@@ -57,27 +209,23 @@ async def get_current_user(
         user_id = payload.get("user_id")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        result = await db.execute(
-            select(UserModel)
-            .options(selectinload(UserModel.group))
-            .options(selectinload(UserModel.region))
-            .where(UserModel.id == user_id)
-        )
-        user = result.scalar_one_or_none()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
     except (TokenExpiredError, InvalidTokenError):
         raise HTTPException(status_code=400, detail="Invalid or expired token")
-        
-    return UserRetrieveSchema(
-        id=user.id,
-        email=user.email,
-        is_active=user.is_active,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        group=UserGroupEnum(user.group.name),
-        region=user.region
-    )
+
+    user = principal_cache.get(user_id)
+    if user is None:
+        user_model = await get_user_by_id(db, user_id)
+        if not user_model:
+            raise HTTPException(status_code=404, detail="User not found")
+        user = _build_user_principal(user_model)
+        principal_cache.set(user_id, user)
+
+    if not _access_token_claims_match(payload, user):
+        raise HTTPException(status_code=401, detail="Token is outdated, please log in again")
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="User account is not activated.")
+
+    return user
 
 def require_roles(roles: Iterable[str]) -> Callable:
     roles_set = {role.upper() for role in roles}
@@ -93,7 +241,8 @@ async def get_checkout_session(
     order_id: int,
     db: AsyncSession,
     user: UserRetrieveSchema,
-    settings: BaseAppSettings
+    gateway: PaymentGatewayInterface,
+    idempotency_key: str | None = None,
 ):
     stmt = select(Order).options(
         selectinload(Order.items).selectinload(OrderItem.movie),
@@ -110,34 +259,28 @@ async def get_checkout_session(
     if order.status == OrderStatus.PAID:
         raise HTTPException(status_code=400, detail="Order is already paid")
 
+    line_items = [
+        CheckoutLineItem(name=item.movie.name, unit_amount=int(item.price_at_order * 100))
+        for item in order.items
+    ]
+    # End the read transaction so no connection or lock is held while
+    # waiting for the gateway.
+    await db.commit()
     try:
-        stripe.api_key = settings.STRIPE_API_KEY
-        list_items = []
-
-        for item in order.items:    
-            list_items.append({
-                "price_data": {
-                    "currency": "usd",
-                    "product_data": {
-                        "name": item.movie.name
-                    },
-                    "unit_amount": int(item.price_at_order * 100),
-                },
-                "quantity": 1
-            })
-
-        session = stripe.checkout.Session.create(
+        session = await gateway.create_checkout_session(
+            line_items=line_items,
             success_url="http://127.0.0.1:8000/api/v1/payment/success?session_id={CHECKOUT_SESSION_ID}",
             cancel_url=f"http://127.0.0.1:8000/api/v1/orders/cancel?order_id={order.id}",
-            line_items=list_items,
-            mode="payment",
             metadata={
                 "order_id": str(order.id),
                 "user_id": str(user.id)
             },
+            # Gateway keys are account-wide, so scope the client's key to the order.
+            idempotency_key=f"checkout-{order.id}-{idempotency_key}" if idempotency_key else None,
         )
+    except PaymentGatewayUnavailableError as e:
+        raise HTTPException(status_code=503, detail=e.user_message)
+    except PaymentGatewayError as e:
+        raise HTTPException(status_code=400, detail=f"Payment error: {e.user_message}")
 
-        return {"checkout_url": session.url}
-
-    except stripe.error.StripeError as e:
-        raise HTTPException(status_code=400, detail=f"Stripe error: {e.user_message}")
\ No newline at end of file
+    return {"checkout_url": session.url}
\ No newline at end of file
@@ -23,17 +23,66 @@ class BaseAppSettings(BaseSettings):
     EMAIL_HOST_PASSWORD: str = os.getenv("EMAIL_HOST_PASSWORD", "test_password")
     EMAIL_USE_TLS: bool = os.getenv("EMAIL_USE_TLS", "False").lower() == "true"
     MAILHOG_API_PORT: int = os.getenv("MAILHOG_API_PORT", 8025)
+    EMAIL_POOL_SIZE: int = int(os.getenv("EMAIL_POOL_SIZE", 4))
+    EMAIL_MAX_MESSAGES_PER_CONNECTION: int = int(os.getenv("EMAIL_MAX_MESSAGES_PER_CONNECTION", 100))
+    EMAIL_CONNECTION_IDLE_TIMEOUT: int = int(os.getenv("EMAIL_CONNECTION_IDLE_TIMEOUT", 30))
+    EMAIL_TASK_RATE_LIMIT: str = os.getenv("EMAIL_TASK_RATE_LIMIT", "20/s")
+    EMAIL_TASK_MAX_RETRIES: int = int(os.getenv("EMAIL_TASK_MAX_RETRIES", 6))
+    EMAIL_TASK_RETRY_BACKOFF: int = int(os.getenv("EMAIL_TASK_RETRY_BACKOFF", 5))
+    EMAIL_TASK_RETRY_BACKOFF_MAX: int = int(os.getenv("EMAIL_TASK_RETRY_BACKOFF_MAX", 600))
 
     SECRET_KEY_ACCESS: str = os.getenv("SECRET_KEY_ACCESS", str(os.urandom(32)))
     SECRET_KEY_REFRESH: str = os.getenv("SECRET_KEY_REFRESH", str(os.urandom(32)))
     JWT_SIGNING_ALGORITHM: str = os.getenv("JWT_SIGNING_ALGORITHM", "HS256")
 
+    MAX_SESSIONS_PER_USER: int = int(os.getenv("MAX_SESSIONS_PER_USER", 10))
+    TOKEN_CLEANUP_BATCH_SIZE: int = int(os.getenv("TOKEN_CLEANUP_BATCH_SIZE", 5000))
+    IDEMPOTENCY_KEY_TTL: int = int(os.getenv("IDEMPOTENCY_KEY_TTL", 24 * 3600))
+    IDEMPOTENCY_IN_PROGRESS_TIMEOUT: int = int(os.getenv("IDEMPOTENCY_IN_PROGRESS_TIMEOUT", 60))
+
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASHER_WORKERS: int = int(os.getenv("PASSWORD_HASHER_WORKERS", 4))
+    PASSWORD_HASHER_MAX_PENDING: int = int(os.getenv("PASSWORD_HASHER_MAX_PENDING", 64))
+
     STRIPE_API_KEY: str
+    PAYMENT_GATEWAY_BACKEND: str = os.getenv("PAYMENT_GATEWAY_BACKEND", "stripe")
+    STRIPE_TIMEOUT: float = float(os.getenv("STRIPE_TIMEOUT", 10))
+    STRIPE_CONNECT_TIMEOUT: float = float(os.getenv("STRIPE_CONNECT_TIMEOUT", 3))
+    STRIPE_MAX_NETWORK_RETRIES: int = int(os.getenv("STRIPE_MAX_NETWORK_RETRIES", 1))
+    PAYMENT_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("PAYMENT_CIRCUIT_FAILURE_THRESHOLD", 5))
+    PAYMENT_CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("PAYMENT_CIRCUIT_RESET_TIMEOUT", 30))
+    FAKE_PAYMENT_LATENCY: float = float(os.getenv("FAKE_PAYMENT_LATENCY", 0))
+
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/1")
+    MOVIE_CACHE_BACKEND: str = os.getenv("MOVIE_CACHE_BACKEND", "memory")
+    MOVIE_CACHE_TTL: int = int(os.getenv("MOVIE_CACHE_TTL", 300))
+    MOVIE_CACHE_MAXSIZE: int = int(os.getenv("MOVIE_CACHE_MAXSIZE", 10000))
+    MOVIE_CACHE_INVALIDATION_HOLD: float = float(os.getenv("MOVIE_CACHE_INVALIDATION_HOLD", 10))
+    CART_STORE_BACKEND: str = os.getenv("CART_STORE_BACKEND", "database")
+    CART_TTL: int = int(os.getenv("CART_TTL", 7 * 24 * 3600))
+    CART_SYNC_INTERVAL: int = int(os.getenv("CART_SYNC_INTERVAL", 30))
+    USER_PRINCIPAL_CACHE_TTL: int = int(os.getenv("USER_PRINCIPAL_CACHE_TTL", 30))
+    USER_PRINCIPAL_CACHE_MAXSIZE: int = int(os.getenv("USER_PRINCIPAL_CACHE_MAXSIZE", 10000))
+
+    INSTRUMENTATION_ENABLED: bool = os.getenv("INSTRUMENTATION_ENABLED", "False").lower() == "true"
+    INSTRUMENTATION_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("INSTRUMENTATION_N_PLUS_ONE_THRESHOLD", 20))
+    INSTRUMENTATION_PROFILING_ENABLED: bool = os.getenv("INSTRUMENTATION_PROFILING_ENABLED", "False").lower() == "true"
+    INSTRUMENTATION_PROFILE_INTERVAL: float = float(os.getenv("INSTRUMENTATION_PROFILE_INTERVAL", 0.005))
+    INSTRUMENTATION_TOKEN: str = os.getenv("INSTRUMENTATION_TOKEN", "")
     
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_PORT: int = 5432
+    POSTGRES_POOL_SIZE: int = int(os.getenv("POSTGRES_POOL_SIZE", 10))
+    POSTGRES_MAX_OVERFLOW: int = int(os.getenv("POSTGRES_MAX_OVERFLOW", 20))
+    POSTGRES_POOL_TIMEOUT: float = float(os.getenv("POSTGRES_POOL_TIMEOUT", 30))
+    POSTGRES_POOL_RECYCLE: int = int(os.getenv("POSTGRES_POOL_RECYCLE", 1800))
+    POSTGRES_POOL_PRE_PING: bool = os.getenv("POSTGRES_POOL_PRE_PING", "True").lower() == "true"
+    POSTGRES_STATEMENT_CACHE_SIZE: int = int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", 100))
+    POSTGRES_PGBOUNCER_TRANSACTION_MODE: bool = (
+        os.getenv("POSTGRES_PGBOUNCER_TRANSACTION_MODE", "False").lower() == "true"
+    )
 
     
\ No newline at end of file
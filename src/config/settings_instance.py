@@ -1,4 +1,7 @@
+from functools import lru_cache
+
 from src.config.settings import BaseAppSettings
 
+@lru_cache
 def get_settings() -> BaseAppSettings:
     return BaseAppSettings()
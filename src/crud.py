@@ -1,26 +1,185 @@
 import datetime
+import re
+import uuid
 import sqlalchemy as sa
-from typing import List, Tuple
+from typing import Iterable
+from sqlalchemy.dialects.postgresql import JSON, REGCONFIG, TSQUERY, aggregate_order_by, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from src.database.models.accounts import ActivationTokenModel, UserModel
-from src.database.models.movies import Genre, Movie, Star, Director
+from sqlalchemy.orm import joinedload
+from src.database.models.accounts import (
+    ActivationTokenModel, PasswordResetToken, RefreshToken, UserGroupEnum, UserModel
+)
+from src.database.models.movies import (
+    Certification, Genre, Movie, MovieLike, PurchasedMovie, Rating, Star, Director,
+    movie_directors, movie_genres, movie_stars
+)
+from src.database.models.orders import IdempotencyKey, Order, OrderItem, OrderStatus
 from src.database.models.regions import MovieRegion, Region
+from src.database.models.shopping_cart import Cart, CartItem
+from src.schemas.movies import MovieRetrieve
+from src.security.token_manager import hash_token
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> UserModel | None:
-    """Retrieve a user by their email address."""
+    """Retrieve a user by their email address, with group and region loaded."""
 
-    result = await db.execute(select(UserModel).where(UserModel.email == email))
+    result = await db.execute(
+        select(UserModel)
+        .options(joinedload(UserModel.group), joinedload(UserModel.region))
+        .where(UserModel.email == email)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> UserModel | None:
+    """Retrieve a user by id, with group and region loaded in the same statement."""
+
+    result = await db.execute(
+        select(UserModel)
+        .options(joinedload(UserModel.group), joinedload(UserModel.region))
+        .where(UserModel.id == user_id)
+    )
     return result.scalar_one_or_none()
 
 
-def delete_expired_tokens(db):
+def build_access_token_claims(user: UserModel) -> dict:
+    """
+    Claims embedded in access tokens. get_current_user rejects a token whose
+    claims no longer match the user, so group or status changes take effect
+    without waiting for the token to expire.
+    """
+
+    return {
+        "user_id": user.id,
+        "group": UserGroupEnum(user.group.name).value,
+        "region": user.region.code if user.region else None,
+        "is_active": user.is_active,
+    }
+
+
+def new_refresh_token_claims(user_id: int, family_id: str | None = None) -> dict:
+    """
+    Claims for a refresh JWT. ``jti`` makes every token unique, even two
+    issued to the same user in the same second; ``fid`` names the rotation
+    family and starts a new one when ``family_id`` is not given.
+    """
+
+    return {"user_id": user_id, "fid": family_id or uuid.uuid4().hex, "jti": uuid.uuid4().hex}
+
+
+async def store_refresh_token(
+    db: AsyncSession,
+    user_id: int,
+    token: str,
+    family_id: str,
+    expires_at: datetime.datetime,
+    max_sessions: int | None = None,
+) -> None:
+    """
+    Store the hash of a refresh token. With ``max_sessions``, the user's
+    expired sessions and the oldest ones beyond that many are evicted in the
+    same transaction. The caller commits.
+    """
+
+    if max_sessions is not None:
+        # Serialize concurrent logins of one user so each eviction sees the
+        # sessions the others inserted.
+        await db.execute(select(UserModel.id).where(UserModel.id == user_id).with_for_update())
+    await db.execute(sa.insert(RefreshToken).values(
+        user_id=user_id, token=hash_token(token), family_id=family_id, expires_at=expires_at
+    ))
+    if max_sessions is None:
+        return
+    newest = (
+        select(RefreshToken.id)
+        .where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.expires_at > datetime.datetime.now(datetime.timezone.utc),
+        )
+        .order_by(RefreshToken.id.desc())
+        .limit(max_sessions)
+    )
+    await db.execute(
+        sa.delete(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.id.not_in(newest))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def consume_refresh_token(db: AsyncSession, token: str) -> tuple[int, str] | None:
+    """
+    Delete a live refresh token and return its ``(user_id, family_id)``, or
+    None if it is unknown, expired, or was already used. Concurrent calls with
+    the same token cannot both succeed. The caller commits.
+    """
+
+    result = await db.execute(
+        sa.delete(RefreshToken)
+        .where(
+            RefreshToken.token == hash_token(token),
+            RefreshToken.expires_at > datetime.datetime.now(datetime.timezone.utc),
+        )
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.first()
+    return tuple(row) if row else None
+
+
+async def revoke_refresh_token_family(db: AsyncSession, family_id: str) -> int:
+    """Revoke every token rotated from the same login. The caller commits."""
+
+    result = await db.execute(
+        sa.delete(RefreshToken)
+        .where(RefreshToken.family_id == family_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: int) -> int:
+    """Revoke all of a user's sessions in one statement. The caller commits."""
+
+    result = await db.execute(
+        sa.delete(RefreshToken)
+        .where(RefreshToken.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def delete_expired_tokens(db, batch_size: int = 5000) -> dict[str, int]:
+    """
+    Purge expired activation, password reset and refresh tokens, and expired
+    idempotency keys, in batches of ``batch_size`` rows, committing after each batch so no single statement
+    holds locks on a large part of a table. Rows locked by in-flight requests
+    are skipped and picked up by the next run.
+    Returns the number of rows deleted per table.
+    """
+
     now = datetime.datetime.now(datetime.timezone.utc)
-    db.query(ActivationTokenModel).filter(
-        ActivationTokenModel.expires_at < now
-    ).delete(synchronize_session=False)
-    db.commit()
+    purged = {}
+    for model in (ActivationTokenModel, PasswordResetToken, RefreshToken, IdempotencyKey):
+        total = 0
+        while True:
+            batch = (
+                select(model.id)
+                .where(model.expires_at < now)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = db.execute(
+                sa.delete(model)
+                .where(model.id.in_(batch.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                break
+        purged[model.__tablename__] = total
+    return purged
 
 
 async def get_genres_by_ids(db: AsyncSession, ids: list[int]) -> list[Genre]:
@@ -43,28 +202,676 @@ async def get_regions_by_ids(db: AsyncSession, ids: list[int]) -> list[Region]:
     return result.scalars().all()
 
 
-async def split_available_movies(
+async def create_order_from_cart_items(db: AsyncSession, user_id: int, region_code: str | None) -> sa.Row:
+    """
+    Turn the user's cart into a pending order in one statement. A cart movie
+    goes into the order unless it is in one of the user's paid or pending
+    orders, or is not available in ``region_code``. The order is inserted
+    only if at least one movie qualifies, with ``total_amount`` summed from
+    the same rows as its items.
+
+    Returns one row: ``order_id`` and ``total_amount`` (None when no order
+    was created), plus the cart broken down for the response:
+    ``cart_count``, ``unpurchased_count``, ``unavailable_ids`` (unpurchased
+    but unavailable in the region), ``available_count`` and ``excluded_ids``.
+    The caller commits.
+    """
+
+    def ordered_by_user(status: OrderStatus):
+        return (
+            select(OrderItem.id)
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(
+                Order.user_id == user_id,
+                Order.status == status,
+                OrderItem.movie_id == Movie.id,
+            )
+            .exists()
+        )
+
+    movie_region = MovieRegion.__table__
+    available_in_region = (
+        select(movie_region.c.movie_id)
+        .join(Region, Region.id == movie_region.c.region_id)
+        .where(movie_region.c.movie_id == Movie.id, Region.code == region_code)
+        .exists()
+    )
+    cart = (
+        select(Movie.id.label("movie_id"), Movie.price.label("price"))
+        .join(CartItem, CartItem.movie_id == Movie.id)
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .where(Cart.user_id == user_id)
+        .distinct()
+        .subquery()
+    )
+    classified = (
+        select(
+            Movie.id.label("movie_id"),
+            Movie.price.label("price"),
+            ordered_by_user(OrderStatus.PAID).label("purchased"),
+            available_in_region.label("available"),
+            ordered_by_user(OrderStatus.PENDING).label("pending"),
+        )
+        .join(cart, cart.c.movie_id == Movie.id)
+        .cte("classified")
+    )
+    eligible = sa.and_(~classified.c.purchased, classified.c.available, ~classified.c.pending)
+
+    new_order = (
+        pg_insert(Order)
+        .from_select(
+            ["user_id", "status", "total_amount"],
+            select(
+                sa.literal(user_id),
+                sa.literal(OrderStatus.PENDING, Order.__table__.c.status.type),
+                sa.func.sum(classified.c.price),
+            )
+            .where(eligible)
+            .having(sa.func.count() > 0)
+        )
+        .returning(Order.id, Order.total_amount)
+        .cte("new_order")
+    )
+    new_items = (
+        pg_insert(OrderItem)
+        .from_select(
+            ["order_id", "movie_id", "price_at_order"],
+            select(new_order.c.id, classified.c.movie_id, classified.c.price).where(eligible)
+        )
+        .returning(OrderItem.id)
+        .cte("new_items")
+    )
+
+    stmt = select(
+        select(new_order.c.id).scalar_subquery().label("order_id"),
+        select(new_order.c.total_amount).scalar_subquery().label("total_amount"),
+        select(sa.func.count()).select_from(new_items).scalar_subquery().label("item_count"),
+        sa.func.count().label("cart_count"),
+        sa.func.count().filter(~classified.c.purchased).label("unpurchased_count"),
+        sa.func.array_agg(classified.c.movie_id)
+        .filter(sa.and_(~classified.c.purchased, ~classified.c.available))
+        .label("unavailable_ids"),
+        sa.func.count().filter(sa.and_(~classified.c.purchased, classified.c.available)).label("available_count"),
+        sa.func.array_agg(classified.c.movie_id).filter(~eligible).label("excluded_ids"),
+    ).select_from(classified)
+    return (await db.execute(stmt)).one()
+
+
+MOVIE_SEARCH_CONFIG = "english"
+
+
+# First key of the two-key advisory locks taken on a user's orders; the
+# second is the user id.
+ORDER_LOCK_NAMESPACE = 1
+
+
+async def lock_user_orders(db: AsyncSession, user_id: int) -> None:
+    """
+    Serialize order creation and checkout for one user. The lock is released
+    when the current transaction commits or rolls back.
+    """
+
+    await db.execute(select(sa.func.pg_advisory_xact_lock(ORDER_LOCK_NAMESPACE, user_id)))
+
+
+async def get_idempotency_record(
+    db: AsyncSession, user_id: int, scope: str, key: str
+) -> IdempotencyKey | None:
+    stmt = select(IdempotencyKey).where(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key,
+        IdempotencyKey.expires_at > sa.func.now(),
+    )
+    return await db.scalar(stmt)
+
+
+async def save_idempotency_record(
     db: AsyncSession,
-    movie_ids: List[int],
-    user_region: str
-) -> Tuple[List[int], List[int]]:
-    result_existing = await db.execute(
-        sa.select(Movie.id).where(Movie.id.in_(movie_ids))
+    user_id: int,
+    scope: str,
+    key: str,
+    request_hash: str,
+    response_status: int | None,
+    response_body: dict | None,
+    ttl: int,
+) -> None:
+    """
+    Store the response for a key, or mark it in progress when
+    ``response_status`` is None. Replaces an earlier record for the key,
+    such as an expired one the cleanup task has not purged yet. The caller
+    commits.
+    """
+
+    values = {
+        "request_hash": request_hash,
+        "response_status": response_status,
+        "response_body": response_body,
+        "created_at": sa.func.now(),
+        "expires_at": sa.func.now() + datetime.timedelta(seconds=ttl),
+    }
+    stmt = pg_insert(IdempotencyKey).values(user_id=user_id, scope=scope, key=key, **values)
+    await db.execute(
+        stmt.on_conflict_do_update(constraint="uq_idempotency_user_scope_key", set_=values)
     )
-    existing_ids = {row[0] for row in result_existing.all()}
 
-    valid_movie_ids = list(existing_ids)
 
-    result_region = await db.execute(
-        sa.select(MovieRegion.movie_id)
-        .join(Region, MovieRegion.region_id == Region.id)
+async def delete_in_progress_idempotency_record(db: AsyncSession, user_id: int, scope: str, key: str) -> None:
+    """Free a key whose request failed, so a retry can run it again. The caller commits."""
+
+    await db.execute(
+        sa.delete(IdempotencyKey)
         .where(
-            MovieRegion.movie_id.in_(valid_movie_ids),
-            Region.code == user_region
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.response_status.is_(None),
         )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _search_config():
+    return sa.literal_column(f"'{MOVIE_SEARCH_CONFIG}'", type_=REGCONFIG)
+
+
+def _to_tsvector(text, weight: str):
+    return sa.func.setweight(
+        sa.func.to_tsvector(_search_config(), sa.func.coalesce(text, "")),
+        sa.literal_column(f"'{weight}'")
+    )
+
+
+def movie_search_document():
+    """SQL expression building the weighted search document of a movie row."""
+
+    director_names = (
+        select(sa.func.string_agg(Director.name, " "))
+        .join(movie_directors, movie_directors.c.director_id == Director.id)
+        .where(movie_directors.c.movie_id == Movie.id)
+        .scalar_subquery()
+    )
+    star_names = (
+        select(sa.func.string_agg(Star.name, " "))
+        .join(movie_stars, movie_stars.c.star_id == Star.id)
+        .where(movie_stars.c.movie_id == Movie.id)
+        .scalar_subquery()
+    )
+    return (
+        _to_tsvector(Movie.name, "A")
+        .op("||")(_to_tsvector(director_names, "B"))
+        .op("||")(_to_tsvector(star_names, "B"))
+        .op("||")(_to_tsvector(Movie.description, "C"))
+    )
+
+
+def build_movie_search_query(search: str):
+    """
+    Turn free text into a prefix-matching tsquery. Text without any terms
+    (e.g. only punctuation) gives a NULL query, which matches no movie.
+    """
+
+    terms = re.findall(r"\w+", search)
+    if not terms:
+        return sa.cast(sa.null(), TSQUERY)
+    return sa.func.to_tsquery(
+        _search_config(),
+        " & ".join(f"{term}:*" for term in terms)
+    )
+
+
+async def refresh_movie_search_vectors(db: AsyncSession, movie_ids: Iterable[int] | sa.Select) -> None:
+    """Recompute the stored search document for the given movies."""
+
+    if not isinstance(movie_ids, sa.Select):
+        movie_ids = list(movie_ids)
+        if not movie_ids:
+            return
+    await db.execute(
+        sa.update(Movie)
+        .where(Movie.id.in_(movie_ids))
+        .values(search_vector=movie_search_document())
+        .execution_options(synchronize_session=False)
     )
-    available_ids = {row[0] for row in result_region.all()}
 
-    unavailable_ids = set(movie_ids) - available_ids
 
-    return list(available_ids), list(unavailable_ids)
+MOVIE_PRICE_BUCKET_EDGES = (5, 10, 20)
+
+
+def build_movie_filters(
+    search_query=None,
+    year: int | None = None,
+    min_rating: float | None = None,
+    max_rating: float | None = None,
+    genre_ids: list[int] | None = None,
+) -> list:
+    """WHERE clauses shared by the movie list and its total/facet summary."""
+
+    filters = []
+    if search_query is not None:
+        filters.append(Movie.search_vector.op("@@")(search_query))
+    if genre_ids:
+        filters.append(
+            sa.exists()
+            .where(movie_genres.c.movie_id == Movie.id)
+            .where(movie_genres.c.genre_id.in_(genre_ids))
+        )
+    if year:
+        filters.append(Movie.year == year)
+    if min_rating:
+        filters.append(Movie.imdb >= min_rating)
+    if max_rating:
+        filters.append(Movie.imdb <= max_rating)
+    return filters
+
+
+async def count_movies(db: AsyncSession, filters: list) -> int:
+    result = await db.execute(select(sa.func.count()).select_from(Movie).where(*filters))
+    return result.scalar_one()
+
+
+async def get_movie_facets(db: AsyncSession, filters: list) -> dict:
+    """
+    Total hit count plus per-year, per-genre and price-bucket counts for the
+    filtered movies, computed with one GROUPING SETS query.
+    """
+
+    # Literal SQL (not bind parameters) so the same CASE text appears in the
+    # select list and in GROUPING SETS.
+    edges = MOVIE_PRICE_BUCKET_EDGES
+    bucket = sa.case(
+        *[
+            (Movie.price < sa.literal_column(str(edge)), sa.literal_column(str(index)))
+            for index, edge in enumerate(edges)
+        ],
+        else_=sa.literal_column(str(len(edges)))
+    )
+    movie_count = sa.func.count(sa.distinct(Movie.id))
+    stmt = (
+        select(
+            sa.func.grouping(Movie.year, Genre.id, bucket).label("grouping"),
+            Movie.year,
+            Genre.id,
+            Genre.name,
+            bucket.label("bucket"),
+            movie_count.label("count"),
+        )
+        .select_from(Movie)
+        .outerjoin(movie_genres, movie_genres.c.movie_id == Movie.id)
+        .outerjoin(Genre, Genre.id == movie_genres.c.genre_id)
+        .where(*filters)
+        .group_by(
+            sa.func.grouping_sets(
+                sa.text("()"),
+                Movie.year,
+                sa.tuple_(Genre.id, Genre.name),
+                bucket,
+            )
+        )
+    )
+    rows = (await db.execute(stmt)).all()
+
+    total = 0
+    years, genres, buckets = [], [], []
+    for row in rows:
+        if row.grouping == 0b111:
+            total = row.count
+        elif row.grouping == 0b011:
+            years.append({"year": row.year, "count": row.count})
+        elif row.grouping == 0b101 and row.id is not None:
+            genres.append({"id": row.id, "name": row.name, "count": row.count})
+        elif row.grouping == 0b110:
+            lower = edges[row.bucket - 1] if row.bucket > 0 else 0
+            upper = edges[row.bucket] if row.bucket < len(edges) else None
+            buckets.append({"min_price": lower, "max_price": upper, "count": row.count})
+
+    return {
+        "total": total,
+        "facets": {
+            "years": sorted(years, key=lambda facet: facet["year"], reverse=True),
+            "genres": sorted(genres, key=lambda facet: (-facet["count"], facet["name"])),
+            "price_buckets": sorted(buckets, key=lambda facet: facet["min_price"]),
+        },
+    }
+
+
+async def adjust_genre_movie_counts(db: AsyncSession, genre_ids: Iterable[int], delta: int) -> None:
+    """Atomically shift the denormalized Genre.movie_count of the given genres."""
+
+    genre_ids = list(genre_ids)
+    if not genre_ids or not delta:
+        return
+    await db.execute(
+        sa.update(Genre)
+        .where(Genre.id.in_(genre_ids))
+        .values(movie_count=Genre.movie_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _json_array(model, association, foreign_key, *columns):
+    """Correlated subquery aggregating a movie's related rows into a JSON array."""
+
+    row = sa.func.json_build_object(*[item for column in columns for item in (column.key, column)])
+    return sa.func.coalesce(
+        select(sa.func.json_agg(aggregate_order_by(row, model.id)))
+        .select_from(model)
+        .join(association, foreign_key == model.id)
+        .where(association.c.movie_id == Movie.id)
+        .scalar_subquery(),
+        sa.literal_column("'[]'::json"),
+        type_=JSON
+    )
+
+
+async def get_movies_retrieve(db: AsyncSession, movie_ids: Iterable[int]) -> dict[int, MovieRetrieve]:
+    """
+    Load movies with certification, genres, directors, stars and regions in
+    one statement, using json_agg subqueries instead of one selectinload
+    round trip per relation.
+    """
+
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return {}
+
+    movie_region = MovieRegion.__table__
+    stmt = (
+        select(
+            Movie.id, Movie.uuid, Movie.name, Movie.year, Movie.time,
+            Movie.imdb, Movie.votes, Movie.likes_count, Movie.dislikes_count,
+            Movie.meta_score, Movie.gross, Movie.description, Movie.price,
+            sa.func.json_build_object(
+                "id", Certification.id, "name", Certification.name, type_=JSON
+            ).label("certification"),
+            _json_array(Genre, movie_genres, movie_genres.c.genre_id, Genre.id, Genre.name).label("genres"),
+            _json_array(
+                Director, movie_directors, movie_directors.c.director_id, Director.id, Director.name
+            ).label("directors"),
+            _json_array(Star, movie_stars, movie_stars.c.star_id, Star.id, Star.name).label("stars"),
+            _json_array(
+                Region, movie_region, movie_region.c.region_id, Region.id, Region.code, Region.name
+            ).label("regions"),
+        )
+        .join(Certification, Certification.id == Movie.certification_id)
+        .where(Movie.id.in_(movie_ids))
+    )
+    result = await db.execute(stmt)
+    return {row.id: MovieRetrieve.model_validate(dict(row._mapping)) for row in result}
+
+
+async def get_movie_retrieve(db: AsyncSession, movie_id: int) -> MovieRetrieve | None:
+    return (await get_movies_retrieve(db, [movie_id])).get(movie_id)
+
+
+def _cart_movie_columns():
+    return (
+        Movie.name, Movie.year, Movie.imdb,
+        _json_array(Genre, movie_genres, movie_genres.c.genre_id, Genre.id, Genre.name).label("genres"),
+    )
+
+
+async def get_cart_candidate(db: AsyncSession, user_id: int, movie_id: int) -> sa.Row | None:
+    """
+    Everything add-to-cart needs to know about a movie in one statement: the
+    fields returned to the client with its genres, and whether the user
+    already bought it. None if the movie does not exist.
+    """
+
+    purchased = (
+        select(PurchasedMovie.id)
+        .where(PurchasedMovie.user_id == user_id, PurchasedMovie.movie_id == Movie.id)
+        .exists()
+    )
+    result = await db.execute(
+        select(*_cart_movie_columns(), purchased.label("purchased"))
+        .where(Movie.id == movie_id)
+    )
+    return result.first()
+
+
+async def get_cart_movies(db: AsyncSession, movie_ids: list[int]) -> list[dict]:
+    """Cart entries for ``movie_ids`` in the given order, genres included, in one statement."""
+
+    if not movie_ids:
+        return []
+    result = await db.execute(
+        select(Movie.id, *_cart_movie_columns()).where(Movie.id.in_(movie_ids))
+    )
+    movies = {row.id: dict(row._mapping) for row in result}
+    return [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+
+
+async def get_cart_movie_ids(db: AsyncSession, user_id: int) -> list[int]:
+    """Movie ids in the user's cart table, oldest first."""
+
+    result = await db.execute(
+        select(CartItem.movie_id)
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .where(Cart.user_id == user_id)
+        .order_by(CartItem.added_at, CartItem.id)
+    )
+    return list(result.scalars())
+
+
+def _user_cart_items(user_id: int):
+    return CartItem.cart_id.in_(select(Cart.id).where(Cart.user_id == user_id))
+
+
+async def insert_cart_item(db: AsyncSession, user_id: int, movie_id: int) -> bool:
+    """
+    Add a movie to the user's cart, creating the cart on first use, in one
+    INSERT ... ON CONFLICT DO NOTHING statement. Returns False if the movie
+    was already in the cart. The caller commits.
+    """
+
+    new_cart = (
+        pg_insert(Cart)
+        .values(user_id=user_id)
+        .on_conflict_do_nothing(index_elements=[Cart.user_id])
+        .returning(Cart.id)
+        .cte("new_cart")
+    )
+    cart_id = sa.union_all(
+        select(new_cart.c.id),
+        select(Cart.id).where(Cart.user_id == user_id),
+    ).subquery("cart")
+    stmt = (
+        pg_insert(CartItem)
+        .from_select(["cart_id", "movie_id"], select(cart_id.c.id, sa.literal(movie_id)).limit(1))
+        .on_conflict_do_nothing(constraint="uq_cart_movie")
+        .returning(CartItem.id)
+    )
+    for _ in range(2):
+        if await db.scalar(stmt) is not None:
+            return True
+        # Nothing was inserted: either the item is already in the cart, or
+        # a concurrent request created the cart after this statement's
+        # snapshot was taken, so neither branch above could see it.
+        in_cart = await db.scalar(
+            select(
+                select(CartItem.id)
+                .join(Cart, Cart.id == CartItem.cart_id)
+                .where(Cart.user_id == user_id, CartItem.movie_id == movie_id)
+                .exists()
+            )
+        )
+        if in_cart:
+            return False
+    return False
+
+
+async def delete_cart_item(db: AsyncSession, user_id: int, movie_id: int) -> bool:
+    """Remove a movie from the user's cart table. The caller commits."""
+
+    result = await db.execute(
+        sa.delete(CartItem)
+        .where(_user_cart_items(user_id), CartItem.movie_id == movie_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+async def replace_cart_items(db: AsyncSession, user_id: int, movie_ids: list[int]) -> None:
+    """
+    Make the user's cart table hold exactly ``movie_ids``, touching only the
+    rows that differ. Ids of movies deleted in the meantime are skipped. The
+    caller commits.
+    """
+
+    await db.execute(
+        sa.delete(CartItem)
+        .where(_user_cart_items(user_id), CartItem.movie_id.not_in(movie_ids))
+        .execution_options(synchronize_session=False)
+    )
+    if not movie_ids:
+        return
+    await db.execute(
+        pg_insert(Cart).values(user_id=user_id).on_conflict_do_nothing(index_elements=[Cart.user_id])
+    )
+    await db.execute(
+        pg_insert(CartItem)
+        .from_select(
+            ["cart_id", "movie_id"],
+            select(Cart.id, Movie.id)
+            .join(Movie, Movie.id.in_(movie_ids))
+            .where(Cart.user_id == user_id)
+        )
+        .on_conflict_do_nothing(constraint="uq_cart_movie")
+    )
+
+
+def _movie_rating_average(rating_sum, rating_count):
+    return sa.func.round(sa.cast(rating_sum, sa.Numeric) / rating_count, 2)
+
+
+async def upsert_movie_rating(db: AsyncSession, user_id: int, movie_id: int, rating: int) -> bool:
+    """
+    Store a user's rating and apply the delta to the movie's running
+    rating_sum/rating_count in SQL, so no rating rows are read back.
+    Returns False if the movie does not exist. The caller commits.
+    """
+
+    for _ in range(2):
+        previous = await db.scalar(
+            select(Rating.rating)
+            .where(Rating.user_id == user_id, Rating.movie_id == movie_id)
+            .with_for_update()
+        )
+
+        if previous is not None:
+            await db.execute(
+                sa.update(Rating)
+                .where(Rating.user_id == user_id, Rating.movie_id == movie_id)
+                .values(rating=rating)
+            )
+            sum_delta, count_delta = rating - previous, 0
+            break
+
+        inserted = await db.scalar(
+            pg_insert(Rating)
+            .values(user_id=user_id, movie_id=movie_id, rating=rating)
+            .on_conflict_do_nothing(index_elements=[Rating.user_id, Rating.movie_id])
+            .returning(Rating.movie_id)
+        )
+        if inserted is not None:
+            sum_delta, count_delta = rating, 1
+            break
+        # A concurrent request inserted this user's rating first; retry as an update.
+    else:
+        raise RuntimeError("Could not upsert rating")
+
+    new_sum = Movie.rating_sum + sum_delta
+    new_count = Movie.rating_count + count_delta
+    updated = await db.scalar(
+        sa.update(Movie)
+        .where(Movie.id == movie_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            votes=Movie.votes + count_delta,
+            imdb=_movie_rating_average(new_sum, new_count),
+        )
+        .returning(Movie.id)
+        .execution_options(synchronize_session=False)
+    )
+    return updated is not None
+
+
+async def upsert_movie_like(db: AsyncSession, user_id: int, movie_id: int, is_like: bool) -> bool:
+    """
+    Record a like/dislike with INSERT ... ON CONFLICT DO UPDATE and adjust
+    the movie's likes_count/dislikes_count in the same transaction.
+    Returns False if the user's reaction was already the requested one.
+    The caller commits; a missing movie surfaces as IntegrityError.
+    """
+
+    stmt = pg_insert(MovieLike).values(user_id=user_id, movie_id=movie_id, is_like=is_like)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_user_movie_like",
+        set_={"is_like": stmt.excluded.is_like},
+        where=MovieLike.is_like.is_distinct_from(stmt.excluded.is_like),
+    ).returning(sa.literal_column("xmax = 0").label("inserted"))
+    inserted = (await db.execute(stmt)).scalar_one_or_none()
+    if inserted is None:
+        return False
+
+    target, other = (
+        (Movie.likes_count, Movie.dislikes_count) if is_like else (Movie.dislikes_count, Movie.likes_count)
+    )
+    values = {target.key: target + 1}
+    if not inserted:
+        values[other.key] = other - 1
+    await db.execute(
+        sa.update(Movie)
+        .where(Movie.id == movie_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return True
+
+
+def reconcile_movie_ratings(db) -> int:
+    """
+    Recompute rating_sum/rating_count (and imdb) from the ratings table in one
+    bulk UPDATE, touching only movies whose aggregates drifted.
+    Each row is only written if its aggregates still match what the totals
+    were computed against, so a rating applied concurrently is not
+    overwritten; that movie is picked up by the next run instead.
+    Returns the number of movies fixed.
+    """
+
+    totals = (
+        select(
+            Movie.id.label("movie_id"),
+            Movie.rating_sum.label("seen_sum"),
+            Movie.rating_count.label("seen_count"),
+            sa.func.coalesce(sa.func.sum(Rating.rating), 0).label("rating_sum"),
+            sa.func.count(Rating.rating).label("rating_count"),
+        )
+        .outerjoin(Rating, Rating.movie_id == Movie.id)
+        .group_by(Movie.id)
+        .subquery()
+    )
+    result = db.execute(
+        sa.update(Movie)
+        .where(Movie.id == totals.c.movie_id)
+        .where(Movie.rating_sum == totals.c.seen_sum, Movie.rating_count == totals.c.seen_count)
+        .where(
+            sa.or_(
+                Movie.rating_sum != totals.c.rating_sum,
+                Movie.rating_count != totals.c.rating_count,
+            )
+        )
+        .values(
+            rating_sum=totals.c.rating_sum,
+            rating_count=totals.c.rating_count,
+            imdb=sa.case(
+                (totals.c.rating_count > 0, _movie_rating_average(totals.c.rating_sum, totals.c.rating_count)),
+                else_=Movie.imdb,
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
@@ -5,7 +5,7 @@ from src.utils import generate_secure_token
 from typing import List, Optional
 from sqlalchemy import (
     Boolean, Date, DateTime,
-    Enum, Integer, String,
+    Enum, Index, Integer, String,
     ForeignKey, Text, UniqueConstraint, func
 )
 from src.database.models.base import Base
@@ -66,7 +66,7 @@ class UserModel(Base):
         back_populates="user",
         cascade="all, delete-orphan"
     )
-    refresh_token: Mapped[Optional["RefreshToken"]] = relationship(
+    refresh_tokens: Mapped[List["RefreshToken"]] = relationship(
         "RefreshToken",
         back_populates="user",
         cascade="all, delete-orphan"
@@ -139,6 +139,7 @@ class TokenBaseModel(Base):
     expires_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
+        index=True,
         default=lambda: datetime.now(timezone.utc) + timedelta(days=1)
     )
 
@@ -168,12 +169,14 @@ class PasswordResetToken(TokenBaseModel):
 
 
 class RefreshToken(TokenBaseModel):
+    """
+    One login session. ``token`` stores the SHA-256 hex digest of the issued
+    refresh JWT, never the JWT itself. Tokens rotated from the same login
+    share a ``family_id``.
+    """
     __tablename__ = "refresh_tokens"
 
-    user: Mapped[UserModel] = relationship("UserModel", back_populates="refresh_token")
-    token: Mapped[str] = mapped_column(
-        String(512),
-        unique=True,
-        nullable=False,
-        default=generate_secure_token
-    )
+    user: Mapped[UserModel] = relationship("UserModel", back_populates="refresh_tokens")
+    family_id: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+
+    __table_args__ = (Index("ix_refresh_tokens_user_id_id", "user_id", "id"),)
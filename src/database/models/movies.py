@@ -1,11 +1,11 @@
-import datetime
 from typing import List, Optional
 from sqlalchemy import (
-    Boolean, Column, DateTime, Integer, String, Text, ForeignKey,
+    BigInteger, Boolean, Column, DateTime, Index, Integer, String, Text, ForeignKey,
     Table, UniqueConstraint, DECIMAL, func
 )
 from src.database.models.accounts import UserModel
 from src.database.models.base import Base
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import (
     Mapped, mapped_column, relationship
 )
@@ -17,6 +17,7 @@ movie_genres = Table(
     Base.metadata,
     Column("movie_id", ForeignKey("movies.id"), primary_key=True),
     Column("genre_id", ForeignKey("genres.id"), primary_key=True),
+    Index("ix_movie_genres_genre_id_movie_id", "genre_id", "movie_id"),
 )
 
 movie_stars = Table(
@@ -39,6 +40,7 @@ class Genre(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+    movie_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
 
     movies: Mapped[list["Movie"]] = relationship(
         secondary=movie_genres,
@@ -85,6 +87,12 @@ class Movie(Base):
     __tablename__ = "movies"
     __table_args__ = (
         UniqueConstraint("name", "year", "time", name="uq_movie_name_year_time"),
+        Index("ix_movies_year_id", "year", "id"),
+        Index("ix_movies_price_id", "price", "id"),
+        Index("ix_movies_imdb_id", "imdb", "id"),
+        Index("ix_movies_votes_id", "votes", "id"),
+        Index("ix_movies_likes_count_id", "likes_count", "id"),
+        Index("ix_movies_search_vector", "search_vector", postgresql_using="gin"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -94,11 +102,16 @@ class Movie(Base):
     time: Mapped[int] = mapped_column(nullable=False)
     imdb: Mapped[float] = mapped_column(default=0, nullable=False)
     votes: Mapped[int] = mapped_column(default=0, nullable=False)
+    rating_sum: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+    rating_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+    likes_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+    dislikes_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
     meta_score: Mapped[float | None] = mapped_column(nullable=True)
     gross: Mapped[float | None] = mapped_column(nullable=True)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     price: Mapped[float] = mapped_column(DECIMAL(10, 2), nullable=False)
     certification_id: Mapped[int] = mapped_column(ForeignKey("certifications.id"), nullable=False)
+    search_vector: Mapped[str | None] = mapped_column(TSVECTOR, nullable=True, deferred=True)
 
     likes = relationship(
         "MovieLike",
@@ -128,7 +141,7 @@ class Favorite(Base):
     __tablename__ = "favorites"
     user_id = Column(ForeignKey("users.id"), primary_key=True)
     movie_id = Column(ForeignKey("movies.id"), primary_key=True)
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class MovieLike(Base):
@@ -148,11 +161,14 @@ class MovieLike(Base):
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_movie_id_created_at_id", "movie_id", "created_at", "id"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(ForeignKey("users.id"))
     movie_id = Column(ForeignKey("movies.id"))
     text = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
 class Rating(Base):
@@ -169,11 +185,14 @@ class Notification(Base):
     type = Column(String)
     message = Column(Text)
     is_read = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class PurchasedMovie(Base):
     __tablename__ = "purchased_movies"
+    __table_args__ = (
+        Index("ix_purchased_movies_user_id_movie_id", "user_id", "movie_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
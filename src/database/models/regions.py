@@ -1,6 +1,6 @@
 from typing import List
 from sqlalchemy import ForeignKey, Integer, String, Column
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, backref, mapped_column, relationship
 from src.database.models.base import Base
 
 
@@ -26,8 +26,8 @@ class MovieRegion(Base):
     movie_id: Mapped[int] = mapped_column(Integer, ForeignKey('movies.id', ondelete='CASCADE'), primary_key=True)
     region_id: Mapped[int] = mapped_column(Integer, ForeignKey('regions.id'), primary_key=True)
 
-    movie = relationship("Movie", backref="movie_regions")
-    region = relationship("Region", backref="movie_regions")
+    movie = relationship("Movie", backref=backref("movie_regions", viewonly=True), viewonly=True)
+    region = relationship("Region", backref=backref("movie_regions", viewonly=True), viewonly=True)
 
     def __repr__(self):
         return f"<MovieRegion(movie_id={self.movie_id}, region_id={self.region_id})>"
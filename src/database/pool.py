@@ -0,0 +1,34 @@
+import time
+from typing import Callable
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+CheckoutWaitListener = Callable[[float, bool], None]
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that reports how long every checkout waited for a
+    connection to ``checkout_wait_listener(seconds, timed_out)``. The wait
+    includes opening a new connection when the pool has none idle.
+    """
+
+    checkout_wait_listener: CheckoutWaitListener | None = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.checkout_wait_listener is not None:
+                self.checkout_wait_listener(time.perf_counter() - started, timed_out)
+
+    def recreate(self) -> "TimedAsyncAdaptedQueuePool":
+        pool = super().recreate()
+        pool.checkout_wait_listener = self.checkout_wait_listener
+        return pool
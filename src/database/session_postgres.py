@@ -1,3 +1,4 @@
+import uuid
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -6,12 +7,38 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from src.config.settings_instance import get_settings
+from src.database.pool import TimedAsyncAdaptedQueuePool
 
 settings = get_settings()
 
 POSTGRESQL_DATABASE_URL = (f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@"
                            f"{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}")
-postgresql_engine = create_async_engine(POSTGRESQL_DATABASE_URL, echo=False)
+
+
+def _asyncpg_connect_args() -> dict:
+    if settings.POSTGRES_PGBOUNCER_TRANSACTION_MODE:
+        # A transaction-mode PgBouncer hands each transaction to any server
+        # connection, so prepared statements must not be cached or reused by
+        # name across transactions.
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {"prepared_statement_cache_size": settings.POSTGRES_STATEMENT_CACHE_SIZE}
+
+
+postgresql_engine = create_async_engine(
+    POSTGRESQL_DATABASE_URL,
+    echo=False,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    pool_size=settings.POSTGRES_POOL_SIZE,
+    max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+    pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+    pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+    pool_pre_ping=settings.POSTGRES_POOL_PRE_PING,
+    connect_args=_asyncpg_connect_args(),
+)
 AsyncPostgresqlSessionLocal = sessionmaker(
     bind=postgresql_engine,
     class_=AsyncSession,
@@ -21,7 +48,18 @@ AsyncPostgresqlSessionLocal = sessionmaker(
 )
 
 sync_database_url = POSTGRESQL_DATABASE_URL.replace("postgresql+asyncpg", "postgresql")
-sync_postgresql_engine = create_engine(sync_database_url, echo=False)
+sync_postgresql_engine = create_engine(
+    sync_database_url,
+    echo=False,
+    pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+    pool_pre_ping=settings.POSTGRES_POOL_PRE_PING,
+)
+SyncPostgresqlSessionLocal = sessionmaker(
+    bind=sync_postgresql_engine,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 
 async def get_postgresql_db() -> AsyncGenerator[AsyncSession, None]:
@@ -0,0 +1,11 @@
+class PaymentGatewayError(Exception):
+    """Base exception for payment gateway errors."""
+
+    def __init__(self, message: str, user_message: str | None = None) -> None:
+        super().__init__(message)
+        self.user_message = user_message or message
+
+
+class PaymentGatewayUnavailableError(PaymentGatewayError):
+    """The payment gateway timed out, failed or is behind an open circuit breaker."""
+    pass
@@ -0,0 +1,264 @@
+import hmac
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.instrumentation.metrics import (
+    LATENCY_BUCKETS, POOL_WAIT_BUCKETS, QUERY_COUNT_BUCKETS, MetricsRegistry
+)
+from src.instrumentation.profiler import SamplingProfiler
+
+PROFILE_HEADER = "x-profile"
+TOKEN_HEADER = "x-instrumentation-token"
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestStats:
+    """What a single request spent its time on, filled in while it runs."""
+
+    __slots__ = ("queries", "sql_seconds", "statements", "spans")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.statements: Counter[str] = Counter()
+        self.spans: dict[str, float] = defaultdict(float)
+
+
+_current_request: ContextVar[RequestStats | None] = ContextVar("instrumented_request", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Attribute the wall time of the block to ``name`` (e.g. an external API
+    call) in the current request's metrics. Does nothing outside of an
+    instrumented request.
+    """
+    stats = _current_request.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.spans[name] += time.perf_counter() - started
+
+
+_instrumented_engines: set[int] = set()
+
+
+def instrument_engine(engine: AsyncEngine | Engine) -> None:
+    """Count statements and SQL time of ``engine`` against the request that issued them."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if id(sync_engine) in _instrumented_engines:
+        return
+    _instrumented_engines.add(id(sync_engine))
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_request.get() is not None:
+            conn.info.setdefault("instrumentation_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_request.get()
+        started = conn.info.get("instrumentation_started")
+        if stats is None or not started:
+            return
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - started.pop()
+        stats.statements[statement] += 1
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None:
+            connection.info.pop("instrumentation_started", None)
+
+
+class Instrumentation:
+    """
+    Request metrics and recent per-request profiles. Requests issuing more
+    than ``n_plus_one_threshold`` SQL statements are logged together with
+    their most repeated statement, and counted.
+
+    Reading metrics and profiles, and asking for a request to be profiled,
+    requires ``access_token``; with no token configured all of it is refused.
+    """
+
+    def __init__(
+        self,
+        n_plus_one_threshold: int = 20,
+        profiling_enabled: bool = False,
+        profile_interval: float = 0.005,
+        max_profiles: int = 50,
+        access_token: str = "",
+    ) -> None:
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.profiling_enabled = profiling_enabled
+        self.profile_interval = profile_interval
+        self._access_token = access_token
+        self._max_profiles = max_profiles
+        self._profiles: OrderedDict[str, str] = OrderedDict()
+        self._profiles_lock = threading.Lock()
+
+        self.registry = MetricsRegistry()
+        self.request_duration = self.registry.histogram(
+            "http_request_duration_seconds", "Request latency by route.",
+            ("method", "route", "status"), LATENCY_BUCKETS,
+        )
+        self.request_sql_queries = self.registry.histogram(
+            "http_request_sql_queries", "SQL statements issued per request.",
+            ("method", "route"), QUERY_COUNT_BUCKETS,
+        )
+        self.request_sql_seconds = self.registry.counter(
+            "http_request_sql_seconds_total", "Time spent executing SQL.", ("method", "route"),
+        )
+        self.request_span_seconds = self.registry.counter(
+            "http_request_span_seconds_total", "Time spent in named spans such as external calls.",
+            ("method", "route", "span"),
+        )
+        self.n_plus_one = self.registry.counter(
+            "http_request_n_plus_one_total",
+            f"Requests issuing more than {n_plus_one_threshold} SQL statements.", ("method", "route"),
+        )
+        self.pool_size = self.registry.gauge("db_pool_size", "Configured pool size.", ("pool",))
+        self.pool_connections = self.registry.gauge(
+            "db_pool_connections", "Pooled connections by state.", ("pool", "state"),
+        )
+        self.pool_checkout_wait = self.registry.histogram(
+            "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+            ("pool",), POOL_WAIT_BUCKETS,
+        )
+        self.pool_checkout_timeouts = self.registry.counter(
+            "db_pool_checkout_timeouts_total", "Checkouts that gave up after the pool timeout.", ("pool",),
+        )
+
+    def instrument_pool(self, engine: AsyncEngine | Engine, name: str = "postgresql") -> None:
+        """
+        Export connection pool gauges for ``engine`` and, if its pool is a
+        TimedAsyncAdaptedQueuePool, how long checkouts waited. Waits are also
+        attributed to the current request as the ``db_pool_wait`` span.
+        """
+        sync_engine = getattr(engine, "sync_engine", engine)
+        def collect() -> None:
+            # Read through the engine: dispose() replaces its pool.
+            pool = sync_engine.pool
+            self.pool_size.set(name, value=pool.size())
+            self.pool_connections.set(name, "in_use", value=pool.checkedout())
+            self.pool_connections.set(name, "idle", value=pool.checkedin())
+            self.pool_connections.set(name, "overflow", value=max(pool.overflow(), 0))
+
+        def on_checkout_wait(seconds: float, timed_out: bool) -> None:
+            self.pool_checkout_wait.observe(seconds, name)
+            if timed_out:
+                self.pool_checkout_timeouts.inc(name)
+            stats = _current_request.get()
+            if stats is not None:
+                stats.spans["db_pool_wait"] += seconds
+
+        self.registry.add_collector(collect)
+        if hasattr(sync_engine.pool, "checkout_wait_listener"):
+            sync_engine.pool.checkout_wait_listener = on_checkout_wait
+
+    def record(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        self.request_duration.observe(seconds, method, route, status)
+        self.request_sql_queries.observe(stats.queries, method, route)
+        self.request_sql_seconds.inc(method, route, amount=stats.sql_seconds)
+        for name, span_seconds in stats.spans.items():
+            self.request_span_seconds.inc(method, route, name, amount=span_seconds)
+
+        if stats.queries > self.n_plus_one_threshold:
+            self.n_plus_one.inc(method, route)
+            statement, repeats = stats.statements.most_common(1)[0]
+            logging.warning(
+                f"Possible N+1 in {method} {route}: {stats.queries} SQL statements, "
+                f"repeated {repeats}x: {' '.join(statement.split())[:200]}"
+            )
+
+    def is_authorized(self, token: str | None) -> bool:
+        if not self._access_token or token is None:
+            return False
+        return hmac.compare_digest(token.encode(), self._access_token.encode())
+
+    def store_profile(self, profile_id: str, profile: str) -> None:
+        with self._profiles_lock:
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self._max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get_profile(self, profile_id: str) -> str | None:
+        with self._profiles_lock:
+            return self._profiles.get(profile_id)
+
+
+class InstrumentationMiddleware:
+    """
+    Times every HTTP request and records its SQL usage. Requests sent with a
+    valid ``X-Instrumentation-Token`` get a ``Server-Timing`` header with the
+    SQL and total time. When profiling is enabled, such a request sent with
+    ``X-Profile: 1`` is also sampled and its profile id is returned in
+    ``X-Profile-Id``.
+    """
+
+    def __init__(self, app: ASGIApp, instrumentation: Instrumentation) -> None:
+        self.app = app
+        self.instrumentation = instrumentation
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        profiler = profile_id = None
+        headers = Headers(scope=scope)
+        authorized = self.instrumentation.is_authorized(headers.get(TOKEN_HEADER))
+        if authorized and self.instrumentation.profiling_enabled and headers.get(PROFILE_HEADER) == "1":
+            profiler = SamplingProfiler(threading.get_ident(), self.instrumentation.profile_interval)
+            profile_id = uuid.uuid4().hex
+            profiler.start()
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if authorized:
+                    headers = MutableHeaders(scope=message)
+                    total_ms = (time.perf_counter() - started) * 1000
+                    timings = [f'sql;dur={stats.sql_seconds * 1000:.1f};desc="{stats.queries} queries"']
+                    timings.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stats.spans.items())
+                    timings.append(f"total;dur={total_ms:.1f}")
+                    headers.append("Server-Timing", ", ".join(timings))
+                    if profile_id:
+                        headers.append("X-Profile-Id", profile_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            if profiler:
+                self.instrumentation.store_profile(profile_id, profiler.stop())
+            route = scope.get("route")
+            self.instrumentation.record(
+                scope["method"], getattr(route, "path", UNMATCHED_ROUTE), status, elapsed, stats
+            )
@@ -0,0 +1,44 @@
+import os
+import sys
+import threading
+from collections import Counter
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread every ``interval`` seconds from a
+    background thread and aggregates the samples as collapsed stacks, one
+    ``outer;...;inner count`` line per distinct stack. That is the input
+    format of flamegraph.pl and speedscope.
+
+    Async handlers run on the event loop thread, so a request's profile also
+    contains whatever other tasks the loop ran while it was in flight.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, max_depth: int = 64) -> None:
+        self._thread_id = thread_id
+        self._interval = interval
+        self._max_depth = max_depth
+        self._stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stopped.set()
+        self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                return
+            frames = []
+            while frame is not None and len(frames) < self._max_depth:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self._stacks[";".join(reversed(frames))] += 1
@@ -1,5 +1,12 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from src.config.dependencies import get_instrumentation, get_jwt_manager, get_password_hasher, get_payment_gateway
+from src.config.settings_instance import get_settings
+from src.database.session_postgres import postgresql_engine
+from src.instrumentation.middleware import InstrumentationMiddleware, instrument_engine
+
 from src.routes.accounts import router as accounts_router
 from src.routes.movies import router as movies_router
 from src.routes.cart import router as cart_router 
@@ -12,11 +19,27 @@ from src.routes.orders import router as orders_router
 from src.routes.admin.admin_orders import router as admin_orders_router
 from src.routes.payment import router as payment_router
 from src.routes.admin.payment import router as admin_payment_router
+from src.routes.admin.admin_users import router as admin_users_router
+from src.routes.metrics import router as metrics_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the process-wide singletons before the first request instead of
+    # during it. Email templates are compiled by the Celery worker at startup.
+    settings = get_settings()
+    get_jwt_manager(settings)
+    password_hasher = get_password_hasher(settings)
+    payment_gateway = get_payment_gateway(settings)
+    yield
+    password_hasher.shutdown()
+    await payment_gateway.close()
 
 
 app = FastAPI(
     title="Online Cinema API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 API_PREFIX = "/api/v1"
@@ -33,3 +56,12 @@ app.include_router(orders_router, prefix=API_PREFIX, tags=["Orders"])
 app.include_router(admin_orders_router, prefix=API_PREFIX, tags=["Admin - Orders"])
 app.include_router(payment_router, prefix=API_PREFIX, tags=["Payment"])
 app.include_router(admin_payment_router, prefix=API_PREFIX, tags=["Admin - Payment"])
+app.include_router(admin_users_router, prefix=API_PREFIX, tags=["Admin - Users"])
+
+settings = get_settings()
+if settings.INSTRUMENTATION_ENABLED:
+    instrumentation = get_instrumentation(settings)
+    instrument_engine(postgresql_engine)
+    instrumentation.instrument_pool(postgresql_engine)
+    app.add_middleware(InstrumentationMiddleware, instrumentation=instrumentation)
+    app.include_router(metrics_router, tags=["Metrics"])
@@ -1,12 +1,16 @@
+import asyncio
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Iterable
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
 
 import aiosmtplib
+from src.config.settings import BaseAppSettings
 from src.exceptions.emails import BaseEmailError
 from src.notifications.interfaces import EmailSenderInterface
+from src.notifications.smtp_pool import SMTPConnectionPool
 
 
 class EmailSender(EmailSenderInterface):
@@ -24,13 +28,22 @@ class EmailSender(EmailSenderInterface):
         password_reset_email_request_template_name: str,
         password_reset_email_complete_template_name: str,
         password_change_email_complete_template_name: str,
-        successfull_payment_email_template_name: str
+        successfull_payment_email_template_name: str,
+        pool_size: int = 4,
+        max_messages_per_connection: int = 100,
+        connection_idle_timeout: float = 30
     ):
-        self._hostname = hostname
-        self._port = port
         self._email = email
-        self._password = password
-        self._use_tls = use_tls
+        self._pool = SMTPConnectionPool(
+            hostname=hostname,
+            port=port,
+            username=email,
+            password=password,
+            use_tls=use_tls,
+            max_size=pool_size,
+            max_messages_per_connection=max_messages_per_connection,
+            idle_timeout=connection_idle_timeout,
+        )
         self._activation_email_template_name = activation_email_template_name
         self._activation_email_complete_template_name = activation_email_complete_template_name
         self._password_reset_email_request_template_name = password_reset_email_request_template_name
@@ -38,59 +51,135 @@ class EmailSender(EmailSenderInterface):
         self._password_change_email_complete_template_name = password_change_email_complete_template_name
         self._successfull_payment_email_template_name = successfull_payment_email_template_name
 
-        self._env = Environment(loader=FileSystemLoader(template_dir))
+        # Templates are compiled once per process; auto_reload would stat the
+        # file on every render.
+        self._env = Environment(loader=FileSystemLoader(template_dir), auto_reload=False)
+        self._templates: dict[str, Template] = {}
 
-    async def _send_email(self, recipient: str, subject: str, html_content: str) -> None:
+    @classmethod
+    def from_settings(cls, settings: BaseAppSettings) -> "EmailSender":
+        return cls(
+            hostname=settings.EMAIL_HOST,
+            port=settings.EMAIL_PORT,
+            email=settings.EMAIL_HOST_USER,
+            password=settings.EMAIL_HOST_PASSWORD,
+            use_tls=settings.EMAIL_USE_TLS,
+            template_dir=settings.PATH_TO_EMAIL_TEMPLATES_DIR,
+            activation_email_template_name=settings.ACTIVATION_EMAIL_TEMPLATE_NAME,
+            activation_email_complete_template_name=settings.ACTIVATION_EMAIL_COMPLETE_TEMPLATE_NAME,
+            password_reset_email_request_template_name=settings.PASSWORD_RESET_TEMLATE_NAME,
+            password_reset_email_complete_template_name=settings.PASSWORD_RESET_COMPLETE_TEMLATE_NAME,
+            password_change_email_complete_template_name=settings.PASSWORD_CHANGE_COMPLETE_TEMLATE_NAME,
+            successfull_payment_email_template_name=settings.SUCCESSFULL_PAYMENT_EMAIL_TEMPLATE_NAME,
+            pool_size=settings.EMAIL_POOL_SIZE,
+            max_messages_per_connection=settings.EMAIL_MAX_MESSAGES_PER_CONNECTION,
+            connection_idle_timeout=settings.EMAIL_CONNECTION_IDLE_TIMEOUT
+        )
+
+    def load_templates(self) -> None:
+        """Compile every configured template up front (called at startup)."""
+        for name in (
+            self._activation_email_template_name,
+            self._activation_email_complete_template_name,
+            self._password_reset_email_request_template_name,
+            self._password_reset_email_complete_template_name,
+            self._password_change_email_complete_template_name,
+            self._successfull_payment_email_template_name,
+        ):
+            self._get_template(name)
+
+    def _get_template(self, name: str) -> Template:
+        template = self._templates.get(name)
+        if template is None:
+            template = self._templates[name] = self._env.get_template(name)
+        return template
+
+    def _build_message(self, recipient: str, subject: str, html_content: str) -> MIMEMultipart:
         message = MIMEMultipart()
         message["From"] = self._email
         message["To"] = recipient
         message["Subject"] = subject
         message.attach(MIMEText(html_content, "html"))
+        return message
 
+    async def _send_email(self, recipient: str, subject: str, html_content: str) -> None:
+        message = self._build_message(recipient, subject, html_content)
         try:
-            smtp = aiosmtplib.SMTP(hostname=self._hostname, port=self._port, start_tls=self._use_tls)
-            await smtp.connect()
-            if self._use_tls:
-                await smtp.starttls()
-            await smtp.login(self._email, self._password)
-            await smtp.sendmail(self._email, [recipient], message.as_string())
-            await smtp.quit()
+            await self._pool.send_message(message)
         except aiosmtplib.SMTPException as error:
             logging.error(f"Failed to send email to {recipient}: {error}")
             raise BaseEmailError(f"Failed to send email to {recipient}: {error}")
 
+    async def send_many(self, emails: Iterable[tuple[str, str, str]]) -> list[str]:
+        pending = iter([
+            (recipient, self._build_message(recipient, subject, html_content))
+            for recipient, subject, html_content in emails
+        ])
+        failed: list[str] = []
+
+        async def worker() -> None:
+            # Each worker holds one pooled connection and drains the shared
+            # iterator, so messages go out back to back without new handshakes.
+            try:
+                async with self._pool.connection() as connection:
+                    for recipient, message in pending:
+                        try:
+                            await self._pool.send_on(connection, message)
+                        except aiosmtplib.SMTPException as error:
+                            logging.error(f"Failed to send email to {recipient}: {error}")
+                            failed.append(recipient)
+                            if isinstance(error, aiosmtplib.SMTPResponseException) and connection.smtp.is_connected:
+                                continue
+                            # The connection is gone; get a new one or leave the
+                            # rest of the batch to the other workers.
+                            try:
+                                await self._pool.reconnect(connection)
+                            except aiosmtplib.SMTPException as reconnect_error:
+                                logging.error(f"SMTP reconnect failed during bulk send: {reconnect_error}")
+                                return
+            except aiosmtplib.SMTPException as error:
+                logging.error(f"SMTP connection failed during bulk send: {error}")
+
+        await asyncio.gather(*(worker() for _ in range(self._pool.max_size)))
+        # Anything left was never attempted because every connection failed.
+        failed.extend(recipient for recipient, _ in pending)
+        return failed
+
+    async def close(self) -> None:
+        await self._pool.close()
+
     async def send_activation_email(self, email: str, activation_link: str) -> None:
-        template = self._env.get_template(self._activation_email_template_name)
+        template = self._get_template(self._activation_email_template_name)
         html_content = template.render(email=email, activation_link=activation_link)
         subject = "Account Activation"
         await self._send_email(email, subject, html_content)
 
     async def send_activation_complete_email(self, email: str, login_link: str) -> None:
-        template = self._env.get_template(self._activation_email_complete_template_name)
+        template = self._get_template(self._activation_email_complete_template_name)
         html_content = template.render(email=email, login_link=login_link)
         subject = "Account Activation"
         await self._send_email(email, subject, html_content)
 
     async def send_password_reset_email(self, email: str, reset_link: str) -> None:
-        template = self._env.get_template(self._password_reset_email_request_template_name)
+        template = self._get_template(self._password_reset_email_request_template_name)
         html_content = template.render(email=email, reset_link=reset_link)
         subject = "Reset Password"
         await self._send_email(email, subject, html_content)
 
     async def send_password_reset_complete_email(self, email: str, login_link: str) -> None:
-        template = self._env.get_template(self._password_reset_email_complete_template_name)
+        template = self._get_template(self._password_reset_email_complete_template_name)
         html_content = template.render(email=email, login_link=login_link)
         subject = "Reset Password Complete"
         await self._send_email(email, subject, html_content)
 
     async def send_password_change_complete_email(self, email: str, login_link: str) -> None:
-        template = self._env.get_template(self._password_change_email_complete_template_name)
+        template = self._get_template(self._password_change_email_complete_template_name)
         html_content = template.render(email=email, login_link=login_link)
         subject = "Password Change"
         await self._send_email(email, subject, html_content)
 
     async def send_successfull_payment_email(self, email: str, order_id: int) -> None:
-        template = self._env.get_template(self._successfull_payment_email_template_name)
+        template = self._get_template(self._successfull_payment_email_template_name)
         html_content = template.render(email=email, order_id=order_id)
         subject = "Payment Successful"
         await self._send_email(email, subject, html_content)
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Iterable
 
 
 class EmailSenderInterface(ABC):
@@ -40,3 +41,16 @@ class EmailSenderInterface(ABC):
     @abstractmethod
     async def send_successfull_payment_email(self, email, order_id: int) -> None:
         pass
+
+    @abstractmethod
+    async def send_many(self, emails: Iterable[tuple[str, str, str]]) -> list[str]:
+        """
+        Send a batch of already rendered emails.
+
+        Args:
+            emails: (recipient, subject, html_content) tuples.
+
+        Returns:
+            list[str]: Recipients whose message could not be delivered.
+        """
+        pass
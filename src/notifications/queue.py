@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from typing import Iterable
+
+from kombu.exceptions import OperationalError
+
+from src.celery_scheduler.celery import celery
+from src.notifications.interfaces import EmailSenderInterface
+
+SEND_EMAIL_TASK = "src.celery_scheduler.tasks.celery_send_email"
+SEND_EMAIL_BATCH_TASK = "src.celery_scheduler.tasks.celery_send_email_batch"
+
+
+class QueuedEmailSender(EmailSenderInterface):
+    """
+    Web-tier email sender: every call enqueues a Celery task and returns once
+    the broker has accepted it. Rendering, SMTP delivery, retries and
+    dead-lettering happen in the worker (see src/celery_scheduler/tasks.py).
+    """
+
+    async def _enqueue(self, task_name: str, *args) -> bool:
+        try:
+            # send_task does blocking broker I/O; keep it off the event loop.
+            await asyncio.to_thread(celery.send_task, task_name, args=list(args))
+            return True
+        except OperationalError as error:
+            logging.error(f"Could not enqueue {task_name}: {error}")
+            return False
+
+    async def send_activation_email(self, email: str, activation_link: str) -> None:
+        await self._enqueue(SEND_EMAIL_TASK, "send_activation_email", email, activation_link)
+
+    async def send_activation_complete_email(self, email: str, login_link: str) -> None:
+        await self._enqueue(SEND_EMAIL_TASK, "send_activation_complete_email", email, login_link)
+
+    async def send_password_reset_email(self, email: str, reset_link: str) -> None:
+        await self._enqueue(SEND_EMAIL_TASK, "send_password_reset_email", email, reset_link)
+
+    async def send_password_reset_complete_email(self, email: str, login_link: str) -> None:
+        await self._enqueue(SEND_EMAIL_TASK, "send_password_reset_complete_email", email, login_link)
+
+    async def send_password_change_complete_email(self, email: str, login_link: str) -> None:
+        await self._enqueue(SEND_EMAIL_TASK, "send_password_change_complete_email", email, login_link)
+
+    async def send_successfull_payment_email(self, email: str, order_id: int) -> None:
+        await self._enqueue(SEND_EMAIL_TASK, "send_successfull_payment_email", email, order_id)
+
+    async def send_many(self, emails: Iterable[tuple[str, str, str]]) -> list[str]:
+        emails = [list(email) for email in emails]
+        if not emails or await self._enqueue(SEND_EMAIL_BATCH_TASK, emails):
+            return []
+        return [recipient for recipient, _, _ in emails]
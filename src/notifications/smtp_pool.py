@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from email.message import Message
+from typing import AsyncIterator
+
+import aiosmtplib
+
+
+class _PooledConnection:
+
+    def __init__(self, smtp: aiosmtplib.SMTP) -> None:
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Keeps up to ``max_size`` authenticated SMTP connections open and hands
+    them out for sending, instead of connecting, STARTTLS-ing and logging in
+    for every message.
+
+    Connections idle for longer than ``idle_timeout`` are probed with NOOP
+    before reuse. A connection is replaced after
+    ``max_messages_per_connection`` messages. A send that fails because the
+    server dropped the connection is retried once on a fresh connection.
+
+    Connections belong to the event loop that opened them. If the pool is
+    used from a new loop (e.g. a worker calling ``asyncio.run`` per task),
+    the stale connections are discarded.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str,
+        password: str,
+        use_tls: bool,
+        max_size: int = 4,
+        max_messages_per_connection: int = 100,
+        idle_timeout: float = 30,
+    ) -> None:
+        self._hostname = hostname
+        self._port = port
+        self._username = username
+        self._password = password
+        self._use_tls = use_tls
+        self._max_size = max_size
+        self._max_messages_per_connection = max_messages_per_connection
+        self._idle_timeout = idle_timeout
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._idle: list[_PooledConnection] = []
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def _bind_to_running_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        for connection in self._idle:
+            connection.smtp.close()
+        self._idle = []
+        self._loop = loop
+        self._slots = asyncio.Semaphore(self._max_size)
+
+    async def _connect(self) -> _PooledConnection:
+        smtp = aiosmtplib.SMTP(hostname=self._hostname, port=self._port, start_tls=self._use_tls)
+        await smtp.connect()
+        await smtp.login(self._username, self._password)
+        return _PooledConnection(smtp)
+
+    async def _close(self, connection: _PooledConnection) -> None:
+        try:
+            await connection.smtp.quit()
+        except aiosmtplib.SMTPException:
+            connection.smtp.close()
+
+    async def _is_alive(self, connection: _PooledConnection) -> bool:
+        if not connection.smtp.is_connected:
+            return False
+        if time.monotonic() - connection.last_used < self._idle_timeout:
+            return True
+        try:
+            await connection.smtp.noop()
+            return True
+        except aiosmtplib.SMTPException:
+            connection.smtp.close()
+            return False
+
+    async def _checkout(self) -> _PooledConnection:
+        while self._idle:
+            connection = self._idle.pop()
+            if await self._is_alive(connection):
+                return connection
+        return await self._connect()
+
+    async def _checkin(self, connection: _PooledConnection) -> None:
+        connection.last_used = time.monotonic()
+        if (
+            connection.messages_sent >= self._max_messages_per_connection
+            or not connection.smtp.is_connected
+        ):
+            await self._close(connection)
+        else:
+            self._idle.append(connection)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[_PooledConnection]:
+        self._bind_to_running_loop()
+        async with self._slots:
+            connection = await self._checkout()
+            try:
+                yield connection
+            except BaseException:
+                connection.smtp.close()
+                raise
+            else:
+                await self._checkin(connection)
+
+    async def send_message(self, message: Message) -> None:
+        async with self.connection() as connection:
+            await self.send_on(connection, message)
+
+    async def reconnect(self, connection: _PooledConnection) -> None:
+        """Replace the SMTP connection of a checked-out connection with a fresh one."""
+        if connection.smtp.is_connected:
+            await self._close(connection)
+        fresh = await self._connect()
+        connection.smtp = fresh.smtp
+        connection.messages_sent = 0
+
+    async def send_on(self, connection: _PooledConnection, message: Message) -> None:
+        """Send over a checked-out connection, recycling or reconnecting it as needed."""
+        if connection.messages_sent >= self._max_messages_per_connection:
+            await self.reconnect(connection)
+        try:
+            await connection.smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            logging.warning("SMTP connection dropped, reconnecting")
+            await self.reconnect(connection)
+            await connection.smtp.send_message(message)
+        connection.messages_sent += 1
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._close(connection)
@@ -0,0 +1,63 @@
+import time
+
+from src.exceptions.payment import PaymentGatewayUnavailableError
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while instead of letting every
+    request wait for its timeout.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``check`` raises straight away. Once ``reset_timeout`` seconds have passed
+    one trial call is let through (half-open): success closes the circuit,
+    failure opens it again for another ``reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self._reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def check(self) -> None:
+        """Raise if calls are currently not allowed; otherwise let one through."""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        raise PaymentGatewayUnavailableError(
+            f"Circuit breaker {self._name} is open",
+            user_message="Payment service is temporarily unavailable, please try again later",
+        )
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End a call without an outcome, e.g. when it was cancelled."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_in_flight or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
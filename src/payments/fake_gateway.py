@@ -0,0 +1,55 @@
+import asyncio
+import uuid
+
+from src.exceptions.payment import PaymentGatewayError
+from src.payments.interfaces import CheckoutLineItem, CheckoutSession, PaymentGatewayInterface
+
+
+class FakePaymentGateway(PaymentGatewayInterface):
+    """
+    In-memory stand-in for Stripe, for local development and offline load
+    tests of the checkout and payment success flows. Sessions live in this
+    process only and are treated as paid as soon as they are created.
+    ``latency`` seconds are awaited per call to mimic the network round trip.
+    """
+
+    def __init__(self, latency: float = 0.0, checkout_url: str = "http://127.0.0.1:8000/fake-checkout") -> None:
+        self._latency = latency
+        self._checkout_url = checkout_url
+        self._sessions: dict[str, CheckoutSession] = {}
+        self._idempotent: dict[str, str] = {}
+
+    async def _wait(self) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+    async def create_checkout_session(
+        self,
+        line_items: list[CheckoutLineItem],
+        success_url: str,
+        cancel_url: str,
+        metadata: dict[str, str],
+        idempotency_key: str | None = None,
+    ) -> CheckoutSession:
+        await self._wait()
+        if idempotency_key in self._idempotent:
+            return self._sessions[self._idempotent[idempotency_key]]
+        session_id = f"cs_fake_{uuid.uuid4().hex}"
+        session = CheckoutSession(
+            id=session_id,
+            url=f"{self._checkout_url}/{session_id}",
+            metadata=dict(metadata),
+        )
+        self._sessions[session_id] = session
+        if idempotency_key:
+            self._idempotent[idempotency_key] = session_id
+        return session
+
+    async def retrieve_checkout_session(self, session_id: str) -> CheckoutSession:
+        await self._wait()
+        try:
+            return self._sessions[session_id]
+        except KeyError:
+            raise PaymentGatewayError(
+                f"No such checkout session: {session_id}", user_message="Checkout session not found"
+            )
@@ -0,0 +1,53 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class CheckoutLineItem:
+    name: str
+    unit_amount: int  # in the smallest currency unit, e.g. cents
+    quantity: int = 1
+    currency: str = "usd"
+
+
+@dataclass(frozen=True)
+class CheckoutSession:
+    id: str
+    url: str | None
+    metadata: dict[str, str] = field(default_factory=dict)
+
+
+class PaymentGatewayInterface(ABC):
+
+    @abstractmethod
+    async def create_checkout_session(
+        self,
+        line_items: list[CheckoutLineItem],
+        success_url: str,
+        cancel_url: str,
+        metadata: dict[str, str],
+        idempotency_key: str | None = None,
+    ) -> CheckoutSession:
+        """
+        Create a hosted checkout page for the given items.
+
+        Raises:
+            PaymentGatewayUnavailableError: The gateway could not be reached.
+            PaymentGatewayError: The gateway rejected the request.
+        """
+        pass
+
+    @abstractmethod
+    async def retrieve_checkout_session(self, session_id: str) -> CheckoutSession:
+        """
+        Look up a checkout session created earlier.
+
+        Raises:
+            PaymentGatewayUnavailableError: The gateway could not be reached.
+            PaymentGatewayError: The session does not exist or the gateway rejected the request.
+        """
+        pass
+
+    async def close(self) -> None:
+        """Release network connections held by the gateway."""
+        pass
@@ -0,0 +1,95 @@
+import httpx
+import stripe
+
+from src.exceptions.payment import PaymentGatewayError, PaymentGatewayUnavailableError
+from src.instrumentation.middleware import span
+from src.payments.circuit_breaker import CircuitBreaker
+from src.payments.interfaces import CheckoutLineItem, CheckoutSession, PaymentGatewayInterface
+
+UNAVAILABLE_MESSAGE = "Payment service is temporarily unavailable, please try again later"
+
+
+class StripePaymentGateway(PaymentGatewayInterface):
+    """
+    Stripe Checkout over Stripe's async API, sharing one httpx connection
+    pool for all requests. The API key is bound to this client rather than
+    set on the ``stripe`` module for every request.
+
+    Network errors, timeouts, rate limiting and Stripe 5xx responses count
+    as failures for the circuit breaker; requests Stripe rejects (4xx) do not.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        timeout: float = 10,
+        connect_timeout: float = 3,
+        max_network_retries: int = 1,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self._http_client = stripe.HTTPXClient(timeout=httpx.Timeout(timeout, connect=connect_timeout))
+        self._client = stripe.StripeClient(
+            api_key,
+            http_client=self._http_client,
+            max_network_retries=max_network_retries,
+        )
+        self._breaker = circuit_breaker or CircuitBreaker("stripe")
+
+    async def _call(self, request):
+        self._breaker.check()
+        try:
+            with span("stripe"):
+                result = await request()
+        except (stripe.APIConnectionError, stripe.APIError, stripe.RateLimitError) as error:
+            self._breaker.record_failure()
+            raise PaymentGatewayUnavailableError(str(error), user_message=UNAVAILABLE_MESSAGE) from error
+        except stripe.StripeError as error:
+            self._breaker.record_success()
+            raise PaymentGatewayError(str(error), user_message=error.user_message) from error
+        except BaseException:
+            # Cancellation (e.g. the client went away) or a bug on our side says
+            # nothing about Stripe's health; just free a half-open trial slot.
+            self._breaker.release()
+            raise
+        self._breaker.record_success()
+        return result
+
+    @staticmethod
+    def _to_checkout_session(session) -> CheckoutSession:
+        return CheckoutSession(id=session.id, url=session.url, metadata=dict(session.metadata or {}))
+
+    async def create_checkout_session(
+        self,
+        line_items: list[CheckoutLineItem],
+        success_url: str,
+        cancel_url: str,
+        metadata: dict[str, str],
+        idempotency_key: str | None = None,
+    ) -> CheckoutSession:
+        params = {
+            "success_url": success_url,
+            "cancel_url": cancel_url,
+            "line_items": [
+                {
+                    "price_data": {
+                        "currency": item.currency,
+                        "product_data": {"name": item.name},
+                        "unit_amount": item.unit_amount,
+                    },
+                    "quantity": item.quantity,
+                }
+                for item in line_items
+            ],
+            "mode": "payment",
+            "metadata": metadata,
+        }
+        options = {"idempotency_key": idempotency_key} if idempotency_key else {}
+        session = await self._call(lambda: self._client.v1.checkout.sessions.create_async(params, options))
+        return self._to_checkout_session(session)
+
+    async def retrieve_checkout_session(self, session_id: str) -> CheckoutSession:
+        session = await self._call(lambda: self._client.v1.checkout.sessions.retrieve_async(session_id))
+        return self._to_checkout_session(session)
+
+    async def close(self) -> None:
+        await self._http_client.close_async()
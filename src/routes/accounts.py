@@ -1,6 +1,6 @@
 import datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,7 +10,15 @@ from src.schemas.movies import MovieOut
 from src.database.models.regions import Region
 from src.database.validators import validate_password_strength
 from src.security.token_manager import JWTTokenManager
-from src.crud import get_user_by_email
+from src.cache import TTLCache
+from src.config.settings import BaseAppSettings
+from src.config.settings_instance import get_settings
+from src.crud import (
+    build_access_token_claims, consume_refresh_token, get_user_by_email, get_user_by_id,
+    new_refresh_token_claims, revoke_refresh_token_family, revoke_user_refresh_tokens,
+    store_refresh_token
+)
+from src.exceptions.token import InvalidTokenError, TokenExpiredError
 from src.schemas.accounts import (
     ChangePasswordSchema, PasswordResetCompleteRequestSchema,
     TokenRefreshRequestSchema, TokenRefreshResponseSchema, UserLoginResponseSchema,
@@ -18,12 +26,15 @@ from src.schemas.accounts import (
 )
 from src.database.models.accounts import (
     ActivationTokenModel, UserGroupEnum,
-    UserModel, UserGroupModel, PasswordResetToken, RefreshToken
+    UserModel, UserGroupModel, PasswordResetToken
 )
 from src.database.session_postgres import get_postgresql_db
 from sqlalchemy import cast, delete, select
-from src.utils import hash_password, verify_password
-from src.config.dependencies import get_accounts_email_notificator, get_current_user, get_jwt_manager
+from src.security.passwords import PasswordHasher
+from src.config.dependencies import (
+    get_accounts_email_notificator, get_current_user, get_jwt_manager,
+    get_password_hasher, get_user_principal_cache, require_roles
+)
 from src.notifications.emails import EmailSenderInterface
 
 router = APIRouter(prefix="/accounts")
@@ -34,9 +45,9 @@ oauth2_schema = OAuth2PasswordBearer(tokenUrl="login")
 async def register_user(
     request: Request,
     user_data: UserRegisterRequestSchema,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_postgresql_db),
     email_sender: EmailSenderInterface = Depends(get_accounts_email_notificator),
+    hasher: PasswordHasher = Depends(get_password_hasher),
 ):
 
     existing_user = await get_user_by_email(db, user_data.email)
@@ -59,7 +70,7 @@ async def register_user(
 
     if not region:
         raise HTTPException(status_code=400, detail="Invalid region code.")
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hasher.hash(user_data.password)
 
     try:
         new_user = UserModel(
@@ -99,20 +110,16 @@ async def register_user(
     else:
         BASE_URL = str(request.base_url)
         activation_link = f"{BASE_URL}accounts/activate/?token={token_value}"
-        background_tasks.add_task(
-            email_sender.send_activation_email,
-            str(user_data.email),
-            activation_link
-        )
+        await email_sender.send_activation_email(str(user_data.email), activation_link)
         return {"message": "User registered successfully. Please check your email to activate your account.",}
 
 
 @router.post("/activate/")
 async def activate_user(
     token: str, request: Request,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_postgresql_db),
     email_sender: EmailSenderInterface = Depends(get_accounts_email_notificator),
+    principal_cache: TTLCache = Depends(get_user_principal_cache),
 ):
 
     stmt = select(ActivationTokenModel).options(selectinload(ActivationTokenModel.user))
@@ -138,20 +145,16 @@ async def activate_user(
             detail="An error occurred during account activation."
         ) from e
     else:
+        principal_cache.delete(user.id)
         BASE_URL = str(request.base_url)
         login_link = f"{BASE_URL}accounts/login/"
-        background_tasks.add_task(
-            email_sender.send_activation_complete_email,
-            str(user.email),
-            login_link
-        )
+        await email_sender.send_activation_complete_email(str(user.email), login_link)
         return {"message": "Account activated successfully."}
 
 
 @router.post("/resend-activation")
 async def resend_activation(
     email: str, request: Request,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_postgresql_db),
     email_sender: EmailSenderInterface = Depends(get_accounts_email_notificator)
 ):
@@ -191,11 +194,7 @@ async def resend_activation(
     else:
         BASE_URL = str(request.base_url)
         activation_link = f"{BASE_URL}accounts/activate/?token={token_value}"
-        background_tasks.add_task(
-            email_sender.send_activation_email,
-            str(email),
-            activation_link
-        )
+        await email_sender.send_activation_email(str(email), activation_link)
         return {"message": "Please check your email to activate your account.",}
 
 
@@ -203,16 +202,19 @@ async def resend_activation(
 async def change_password(
     request: Request,
     data: ChangePasswordSchema,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_postgresql_db),
-    email_sender: EmailSenderInterface = Depends(get_accounts_email_notificator)
+    email_sender: EmailSenderInterface = Depends(get_accounts_email_notificator),
+    principal_cache: TTLCache = Depends(get_user_principal_cache),
+    hasher: PasswordHasher = Depends(get_password_hasher),
 ):
     user = await get_user_by_email(db, data.email)
-    if not verify_password(data.old_password, user._hashed_password):
+    if not await hasher.verify(data.old_password, user._hashed_password):
         raise HTTPException(status_code=400, detail="Wrong old password")
+    validate_password_strength(data.new_password)
+    new_hashed_password = await hasher.hash(data.new_password)
     try:
-        validate_password_strength(data.new_password)
-        user._hashed_password = hash_password(data.new_password)
+        user._hashed_password = new_hashed_password
+        await revoke_user_refresh_tokens(db, user.id)
         await db.commit()
     except SQLAlchemyError as e:
         await db.rollback()
@@ -221,20 +223,16 @@ async def change_password(
             detail="An error occurred during account activation."
         ) from e
     else:
+        principal_cache.delete(user.id)
         BASE_URL = str(request.base_url)
         login_link = f"{BASE_URL}accounts/login/"
-        background_tasks.add_task(
-            email_sender.send_password_change_complete_email,
-            str(data.email),
-            login_link
-        )
+        await email_sender.send_password_change_complete_email(str(data.email), login_link)
         return {"message": "Password changed"}
 
 
 @router.post("/reset-password/request/")
 async def reset_password_request(
     request: Request,
-    background_tasks: BackgroundTasks,
     user_data: UserResetPasswordSchema,
     db: AsyncSession = Depends(get_postgresql_db),
     email_sender: EmailSenderInterface = Depends(get_accounts_email_notificator),
@@ -251,11 +249,7 @@ async def reset_password_request(
     BASE_URL = str(request.base_url)
     reset_password_link = f"{BASE_URL}accounts/reset-password/complete/?token={reset_token.token}"
 
-    background_tasks.add_task(
-        email_sender.send_password_reset_email,
-        str(user_data.email),
-        reset_password_link
-    )
+    await email_sender.send_password_reset_email(str(user_data.email), reset_password_link)
     return {"message": "If you are registered, you will receive an email with instructions."}
 
 
@@ -263,9 +257,10 @@ async def reset_password_request(
 async def reset_password(
     request: Request,
     user_data: PasswordResetCompleteRequestSchema,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_postgresql_db),
     email_sender: EmailSenderInterface = Depends(get_accounts_email_notificator),
+    principal_cache: TTLCache = Depends(get_user_principal_cache),
+    hasher: PasswordHasher = Depends(get_password_hasher),
 ) -> dict:
 
     stmt = select(PasswordResetToken).options(selectinload(PasswordResetToken.user))
@@ -279,9 +274,11 @@ async def reset_password(
     if not user:
         raise HTTPException(status_code=400, detail="User is not registered.")
 
+    new_hashed_password = await hasher.hash(user_data.new_password)
     try:
-        user._hashed_password = hash_password(user_data.new_password)
+        user._hashed_password = new_hashed_password
         await db.delete(reset_password_token)
+        await revoke_user_refresh_tokens(db, user.id)
         await db.commit()
         await db.refresh(user)
     except SQLAlchemyError as e:
@@ -291,13 +288,10 @@ async def reset_password(
             detail="An error occurred during account activation."
         ) from e
     else:
+        principal_cache.delete(user.id)
         BASE_URL = str(request.base_url)
         login_link = f"{BASE_URL}accounts/login/"
-        background_tasks.add_task(
-            email_sender.send_password_reset_complete_email,
-            str(user.email),
-            login_link
-        )
+        await email_sender.send_password_reset_complete_email(str(user.email), login_link)
         return {"message": "Account activated successfully."}
 
 
@@ -306,11 +300,20 @@ async def login_user(
         login_data: UserLoginSchema,
         db: AsyncSession = Depends(get_postgresql_db),
         jwt_manager: JWTTokenManager = Depends(get_jwt_manager),
+        hasher: PasswordHasher = Depends(get_password_hasher),
+        settings: BaseAppSettings = Depends(get_settings),
 ) -> UserLoginResponseSchema:
 
     user = await get_user_by_email(db, login_data.email)
 
-    if not user or not verify_password(login_data.password, user._hashed_password):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password.",
+        )
+
+    is_valid, new_hashed_password = await hasher.verify_and_update(login_data.password, user._hashed_password)
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password.",
@@ -322,16 +325,22 @@ async def login_user(
             detail="User account is not activated.",
         )
 
-    jwt_refresh_token = jwt_manager.create_refresh_token({"user_id": user.id})
+    refresh_claims = new_refresh_token_claims(user.id)
+    jwt_refresh_token = jwt_manager.create_refresh_token(refresh_claims)
 
     try:
-        refresh_token = RefreshToken(
-            user_id = user.id,
-            expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1),
-            token=jwt_refresh_token
+        if new_hashed_password is not None:
+            # The stored hash was made with an older bcrypt cost; upgrade it
+            # now that we know the plain password.
+            user._hashed_password = new_hashed_password
+        await store_refresh_token(
+            db,
+            user_id=user.id,
+            token=jwt_refresh_token,
+            family_id=refresh_claims["fid"],
+            expires_at=datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1),
+            max_sessions=settings.MAX_SESSIONS_PER_USER,
         )
-        db.add(refresh_token)
-        await db.flush()
         await db.commit()
     except SQLAlchemyError:
         await db.rollback()
@@ -340,7 +349,7 @@ async def login_user(
             detail="An error occurred while processing the request.",
         )
 
-    jwt_access_token = jwt_manager.create_access_token({"user_id": user.id})
+    jwt_access_token = jwt_manager.create_access_token(build_access_token_claims(user))
     return UserLoginResponseSchema(
         access_token=jwt_access_token,
         refresh_token=jwt_refresh_token,
@@ -354,31 +363,75 @@ async def refresh_access_token(
         jwt_manager: JWTTokenManager = Depends(get_jwt_manager),
 ) -> TokenRefreshResponseSchema:
 
-    decoded_token = jwt_manager.decode_refresh_token(token_data.token)
-    print(decoded_token)
-    user_id = decoded_token.get("user_id")
+    try:
+        decoded_token = jwt_manager.decode_refresh_token(token_data.token)
+    except (TokenExpiredError, InvalidTokenError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token.",
+        )
 
-    stmt = select(RefreshToken).filter_by(token=token_data.token)
-    result = await db.execute(stmt)
-    refresh_token_record = result.scalars().first()
-    if not refresh_token_record:
+    # Each refresh token is single use: it is deleted here and replaced by a
+    # new one from the same family.
+    consumed = await consume_refresh_token(db, token_data.token)
+    if not consumed:
+        # A correctly signed token that is no longer stored was either
+        # rotated already or revoked. If it was rotated, someone is replaying
+        # it, so end the whole session it belongs to.
+        family_id = decoded_token.get("fid")
+        if family_id:
+            await revoke_refresh_token_family(db, family_id)
+            await db.commit()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token not found.",
         )
+    user_id, family_id = consumed
 
-    stmt = select(UserModel).filter_by(id=user_id)
-    result = await db.execute(stmt)
-    user = result.scalars().first()
+    user = await get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found.",
         )
 
-    new_access_token = jwt_manager.create_access_token({"user_id": user_id})
+    new_refresh_token = jwt_manager.create_refresh_token(new_refresh_token_claims(user.id, family_id))
+    try:
+        await store_refresh_token(
+            db,
+            user_id=user.id,
+            token=new_refresh_token,
+            family_id=family_id,
+            expires_at=datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1),
+        )
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing the request.",
+        )
+
+    new_access_token = jwt_manager.create_access_token(build_access_token_claims(user))
 
-    return TokenRefreshResponseSchema(access_token=new_access_token)
+    return TokenRefreshResponseSchema(access_token=new_access_token, refresh_token=new_refresh_token)
+
+
+@router.post("/logout-all/")
+async def logout_all_sessions(
+    current_user: UserRetrieveSchema = Depends(get_current_user),
+    db: AsyncSession = Depends(get_postgresql_db),
+) -> dict:
+    try:
+        revoked = await revoke_user_refresh_tokens(db, current_user.id)
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing the request.",
+        )
+    return {"message": "All sessions have been revoked.", "revoked_sessions": revoked}
 
 
 @router.get("/me/", response_model=UserRetrieveSchema)
@@ -405,3 +458,8 @@ async def get_my_purchased_movies(
         raise HTTPException(status_code=404, detail="You have no purchased movies")
 
     return [MovieOut.model_validate(purchase.movie) for purchase in purchased_movies]
+
+
+@router.get("/password-hasher/stats/", dependencies=[Depends(require_roles(["admin"]))])
+async def get_password_hasher_stats(hasher: PasswordHasher = Depends(get_password_hasher)) -> dict:
+    return hasher.stats()
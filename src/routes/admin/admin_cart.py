@@ -7,7 +7,8 @@ from sqlalchemy.exc import IntegrityError
 from src.database.models.movies import Movie
 from src.database.models.shopping_cart import Cart, CartItem
 from src.database.session_postgres import get_postgresql_db
-from src.config.dependencies import require_roles
+from src.cart_store import CartStoreInterface
+from src.config.dependencies import get_cart_store, require_roles
 from src.schemas.accounts import UserRetrieveSchema
 from src.schemas.cart import CartMovieItem
 
@@ -21,7 +22,9 @@ router = APIRouter(prefix="/cart/admin")
 async def get_user_cart(
     user_id: int,
     db: AsyncSession = Depends(get_postgresql_db),
+    cart_store: CartStoreInterface = Depends(get_cart_store),
 ):
+    await cart_store.flush(db, user_id)
     try:
         result = await db.execute(
             select(CartItem)
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import TTLCache
+from src.crud import get_user_by_id, revoke_user_refresh_tokens
+from src.database.models.accounts import UserGroupEnum, UserGroupModel
+from src.schemas.accounts import UserAdminUpdateSchema, UserRetrieveSchema
+from src.config.dependencies import get_user_principal_cache, require_roles
+from src.database.session_postgres import get_postgresql_db
+
+
+router = APIRouter(prefix="/admin/users")
+
+@router.patch("/{user_id}/", response_model=UserRetrieveSchema, dependencies=[Depends(require_roles(["ADMIN"]))])
+async def update_user_for_admin(
+    user_id: int,
+    data: UserAdminUpdateSchema,
+    db: AsyncSession = Depends(get_postgresql_db),
+    principal_cache: TTLCache = Depends(get_user_principal_cache),
+):
+    user = await get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if data.group is not None:
+        group = await db.scalar(select(UserGroupModel).where(UserGroupModel.name == data.group))
+        if not group:
+            raise HTTPException(status_code=400, detail="User group does not exist")
+        user.group = group
+    if data.is_active is not None:
+        user.is_active = data.is_active
+        if not data.is_active:
+            await revoke_user_refresh_tokens(db, user_id)
+
+    try:
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to update user")
+
+    principal_cache.delete(user_id)
+
+    user = await get_user_by_id(db, user_id)
+    return UserRetrieveSchema(
+        id=user.id,
+        email=user.email,
+        is_active=user.is_active,
+        created_at=user.created_at,
+        updated_at=user.updated_at,
+        group=UserGroupEnum(user.group.name),
+        region=user.region
+    )
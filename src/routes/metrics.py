@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from src.config.dependencies import get_instrumentation
+from src.instrumentation.middleware import Instrumentation
+
+
+def require_instrumentation_token(
+    token: str | None = Header(None, alias="X-Instrumentation-Token"),
+    instrumentation: Instrumentation = Depends(get_instrumentation),
+) -> None:
+    if not instrumentation.is_authorized(token):
+        raise HTTPException(status_code=403, detail="Access forbidden")
+
+
+router = APIRouter(dependencies=[Depends(require_instrumentation_token)])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(
+    instrumentation: Instrumentation = Depends(get_instrumentation),
+) -> PlainTextResponse:
+    return PlainTextResponse(instrumentation.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(
+    profile_id: str,
+    instrumentation: Instrumentation = Depends(get_instrumentation),
+) -> PlainTextResponse:
+    profile = instrumentation.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile)
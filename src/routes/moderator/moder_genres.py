@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 
-import sqlalchemy as sa
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
 from src.schemas.movies import GenreSchema
+from src.cache import MovieCache, TTLCache
 from src.database.models.movies import Genre, movie_genres
-from src.config.dependencies import require_roles
+from src.config.dependencies import get_movie_cache, get_movie_summary_cache, require_roles
 from src.database.session_postgres import get_postgresql_db
 
 router = APIRouter(prefix="/movies/genres")
@@ -27,11 +27,21 @@ async def create_genre(name: str, db: AsyncSession = Depends(get_postgresql_db))
 
 
 @router.put("/{genre_id}/", response_model=GenreSchema, dependencies=[Depends(require_roles(["moderator"]))])
-async def update_genre(genre_id: int, name: str, db: AsyncSession = Depends(get_postgresql_db)):
+async def update_genre(
+    genre_id: int,
+    name: str,
+    db: AsyncSession = Depends(get_postgresql_db),
+    cache: MovieCache = Depends(get_movie_cache),
+    summary_cache: TTLCache = Depends(get_movie_summary_cache),
+):
     genre = await db.get(Genre, genre_id)
     if not genre:
         raise HTTPException(status_code=404, detail="Genre not found")
 
+    movie_ids = (
+        await db.scalars(select(movie_genres.c.movie_id).where(movie_genres.c.genre_id == genre.id))
+    ).all()
+
     genre.name = name
     try:
         await db.commit()
@@ -40,21 +50,31 @@ async def update_genre(genre_id: int, name: str, db: AsyncSession = Depends(get_
         await db.rollback()
         raise HTTPException(status_code=400, detail="Failed to update genre")
 
-    count_stmt = select(sa.func.count()).select_from(movie_genres).where(movie_genres.c.genre_id == genre.id)
-    result = await db.execute(count_stmt)
-    movie_count = result.scalar()
-
+    await cache.invalidate(movie_ids)
+    summary_cache.clear()
     return GenreSchema.model_validate(genre)
 
 @router.delete("/{genre_id}/", status_code=204, dependencies=[Depends(require_roles(["moderator"]))])
-async def delete_genre(genre_id: int, db: AsyncSession = Depends(get_postgresql_db)):
+async def delete_genre(
+    genre_id: int,
+    db: AsyncSession = Depends(get_postgresql_db),
+    cache: MovieCache = Depends(get_movie_cache),
+    summary_cache: TTLCache = Depends(get_movie_summary_cache),
+):
     genre = await db.get(Genre, genre_id)
     if not genre:
         raise HTTPException(status_code=404, detail="Genre not found")
 
+    movie_ids = (
+        await db.scalars(select(movie_genres.c.movie_id).where(movie_genres.c.genre_id == genre.id))
+    ).all()
+
     await db.delete(genre)
     try:
         await db.commit()
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Cannot delete genre (possibly in use)")
+
+    await cache.invalidate(movie_ids)
+    summary_cache.clear()
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
+from src.crud import adjust_genre_movie_counts, get_movie_retrieve, refresh_movie_search_vectors
 from src.database.validators import validate_movie_attributes
-from src.schemas.movies import MovieCreate, MovieRetrieve, MovieUpdate
-from src.database.models.movies import Movie, PurchasedMovie
-from src.config.dependencies import require_roles
-from src.database.session_postgres import get_postgresql_db
+from src.schemas.movies import CommentRetrieve, MovieCreate, MovieRetrieve, MovieUpdate
+from src.database.models.movies import Comment, Movie, PurchasedMovie
+from src.cache import MovieCache, TTLCache
+from src.config.dependencies import get_movie_cache, get_movie_summary_cache, require_roles
+from src.database.session_postgres import get_postgresql_db, get_postgresql_db_contextmanager
 from sqlalchemy.orm import selectinload
 
 router = APIRouter(prefix="/movies")
@@ -15,6 +18,8 @@ router = APIRouter(prefix="/movies")
 async def create_movie(
     movie_data: MovieCreate,
     db: AsyncSession = Depends(get_postgresql_db),
+    cache: MovieCache = Depends(get_movie_cache),
+    summary_cache: TTLCache = Depends(get_movie_summary_cache),
 ) -> MovieRetrieve:
 
     genres, stars, directors, regions = await validate_movie_attributes(movie_data, db)
@@ -35,26 +40,17 @@ async def create_movie(
     db.add(new_movie)
 
     try:
+        await db.flush()
+        await refresh_movie_search_vectors(db, [new_movie.id])
+        await adjust_genre_movie_counts(db, [genre.id for genre in genres], 1)
         await db.commit()
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Movie with this data already exists")
 
-    stmt = (
-        select(Movie)
-        .options(
-            selectinload(Movie.certification),
-            selectinload(Movie.genres),
-            selectinload(Movie.directors),
-            selectinload(Movie.stars),
-            selectinload(Movie.regions),
-        )
-        .where(Movie.id == new_movie.id)
-    )
-    result = await db.execute(stmt)
-    movie_with_relations = result.scalar_one()
-
-    return MovieRetrieve.model_validate(movie_with_relations)
+    await cache.invalidate([new_movie.id])
+    summary_cache.clear()
+    return await get_movie_retrieve(db, new_movie.id)
 
 from sqlalchemy.orm import selectinload
 
@@ -63,6 +59,8 @@ async def update_movie(
     movie_id: int,
     movie_data: MovieUpdate,
     db: AsyncSession = Depends(get_postgresql_db),
+    cache: MovieCache = Depends(get_movie_cache),
+    summary_cache: TTLCache = Depends(get_movie_summary_cache),
 ):
     result = await db.execute(
         select(Movie)
@@ -70,7 +68,6 @@ async def update_movie(
             selectinload(Movie.genres),
             selectinload(Movie.stars),
             selectinload(Movie.directors),
-            selectinload(Movie.certification),
             selectinload(Movie.regions),
         )
         .where(Movie.id == movie_id)
@@ -81,6 +78,9 @@ async def update_movie(
 
     genres, stars, directors, regions = await validate_movie_attributes(movie_data, db)
 
+    old_genre_ids = {genre.id for genre in movie.genres}
+    new_genre_ids = {genre.id for genre in genres}
+
     movie.name = movie_data.name
     movie.year = movie_data.year
     movie.time = movie_data.time
@@ -93,21 +93,28 @@ async def update_movie(
     movie.regions = regions
 
     try:
+        await db.flush()
+        await refresh_movie_search_vectors(db, [movie.id])
+        await adjust_genre_movie_counts(db, new_genre_ids - old_genre_ids, 1)
+        await adjust_genre_movie_counts(db, old_genre_ids - new_genre_ids, -1)
         await db.commit()
-        await db.refresh(movie)
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Failed to update movie")
 
-    return MovieRetrieve.model_validate(movie)
+    await cache.invalidate([movie.id])
+    summary_cache.clear()
+    return await get_movie_retrieve(db, movie.id)
 
 
 @router.delete("/{movie_id}/", status_code=204, dependencies=[Depends(require_roles(["moderator"]))])
 async def delete_movie(
     movie_id: int,
     db: AsyncSession = Depends(get_postgresql_db),
+    cache: MovieCache = Depends(get_movie_cache),
+    summary_cache: TTLCache = Depends(get_movie_summary_cache),
 ):
-    movie = await db.get(Movie, movie_id)
+    movie = await db.get(Movie, movie_id, options=[selectinload(Movie.genres)])
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
 
@@ -121,9 +128,32 @@ async def delete_movie(
             detail="Cannot delete movie that has been purchased by users"
         )
 
+    genre_ids = [genre.id for genre in movie.genres]
     await db.delete(movie)
     try:
+        await db.flush()
+        await adjust_genre_movie_counts(db, genre_ids, -1)
         await db.commit()
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Failed to delete movie")
+
+    await cache.invalidate([movie_id])
+    summary_cache.clear()
+
+
+@router.get("/{movie_id}/comments/export", dependencies=[Depends(require_roles(["moderator"]))])
+async def export_comments(movie_id: int):
+    async def stream_ndjson():
+        # The stream outlives the request's dependencies, so it owns its session.
+        async with get_postgresql_db_contextmanager() as db:
+            comments = await db.stream_scalars(
+                select(Comment)
+                .where(Comment.movie_id == movie_id)
+                .order_by(Comment.created_at.desc(), Comment.id.desc())
+                .execution_options(yield_per=500)
+            )
+            async for comment in comments:
+                yield CommentRetrieve.model_validate(comment).model_dump_json() + "\n"
+
+    return StreamingResponse(stream_ndjson(), media_type="application/x-ndjson")
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from src.schemas.movies import StarSchema
-from src.database.models.movies import Star
-from src.config.dependencies import require_roles
+from src.crud import refresh_movie_search_vectors
+from src.database.models.movies import Star, movie_stars
+from src.cache import MovieCache
+from src.config.dependencies import get_movie_cache, require_roles
 from src.database.session_postgres import get_postgresql_db
 
 
@@ -24,30 +27,54 @@ async def create_star(name: str, db: AsyncSession = Depends(get_postgresql_db)):
 
 
 @router.put("/{star_id}/", response_model=StarSchema, dependencies=[Depends(require_roles(["moderator"]))])
-async def update_star(star_id: int, name: str, db: AsyncSession = Depends(get_postgresql_db)):
+async def update_star(
+    star_id: int,
+    name: str,
+    db: AsyncSession = Depends(get_postgresql_db),
+    cache: MovieCache = Depends(get_movie_cache),
+):
     star = await db.get(Star, star_id)
     if not star:
         raise HTTPException(status_code=404, detail="Star not found")
 
+    movie_ids = (
+        await db.scalars(select(movie_stars.c.movie_id).where(movie_stars.c.star_id == star.id))
+    ).all()
+
     star.name = name
     try:
+        await db.flush()
+        await refresh_movie_search_vectors(db, movie_ids)
         await db.commit()
         await db.refresh(star)
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Failed to update star")
 
+    await cache.invalidate(movie_ids)
     return star
 
 @router.delete("/{star_id}/", status_code=204, dependencies=[Depends(require_roles(["moderator"]))])
-async def delete_star(star_id: int, db: AsyncSession = Depends(get_postgresql_db)):
+async def delete_star(
+    star_id: int,
+    db: AsyncSession = Depends(get_postgresql_db),
+    cache: MovieCache = Depends(get_movie_cache),
+):
     star = await db.get(Star, star_id)
     if not star:
         raise HTTPException(status_code=404, detail="Star not found")
 
+    movie_ids = (
+        await db.scalars(select(movie_stars.c.movie_id).where(movie_stars.c.star_id == star.id))
+    ).all()
+
     await db.delete(star)
     try:
+        await db.flush()
+        await refresh_movie_search_vectors(db, movie_ids)
         await db.commit()
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Cannot delete star (possibly in use)")
+
+    await cache.invalidate(movie_ids)
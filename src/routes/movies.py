@@ -1,3 +1,4 @@
+import datetime
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
@@ -7,174 +8,267 @@ from sqlalchemy.exc import IntegrityError
 from src.database.models.accounts import UserModel
 from src.schemas.accounts import UserRetrieveSchema
 from src.schemas.movies import (
-    CommentCreate, CommentRetrieve,
-    GenreCount, MovieListItem, MovieRetrieve
+    CommentCreate, CommentPage, CommentRetrieve,
+    GenreCount, MovieBatchResponse, MovieListItem, MovieListPage, MovieRetrieve
 )
 from src.database.models.movies import (
-    Comment, Director, Favorite,
-    Genre, Movie, MovieLike,
-    Rating, Star, movie_genres
+    Comment, Favorite,
+    Genre, Movie
 )
-from src.config.dependencies import get_current_user
+from src.crud import (
+    build_movie_filters, build_movie_search_query,
+    count_movies, get_movie_facets, get_movie_retrieve, get_movies_retrieve,
+    upsert_movie_like, upsert_movie_rating
+)
+from src.cache import MovieCache, TTLCache
+from src.config.dependencies import get_current_user, get_movie_cache, get_movie_summary_cache, require_roles
 from src.database.session_postgres import get_postgresql_db
-from sqlalchemy.orm import selectinload
+from src.utils import decode_cursor, encode_cursor
 
 
 router = APIRouter(prefix="/movies")
 
-@router.get("/", response_model=List[MovieListItem])
+MAX_BATCH_MOVIE_IDS = 50
+
+@router.get("/", response_model=List[MovieListItem] | MovieListPage)
 async def movies_list(
     db: AsyncSession = Depends(get_postgresql_db),
     limit: int = Query(10, ge=1),
     page: int = Query(1, ge=1),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: str | None = Query(None),
     year: int | None = Query(None),
     min_rating: float | None = Query(None),
     max_rating: float | None = Query(None),
+    genre_ids: List[int] | None = Query(None),
     search: str | None = Query(None),
-    sort_by: str = Query("release_date"),
+    sort_by: str | None = Query(None),
     sort_order: str = Query("desc"),
+    include: str | None = Query(None, description="Comma-separated extras: total, facets"),
+    summary_cache: TTLCache = Depends(get_movie_summary_cache),
 ):
-    offset = (page - 1) * limit
-    stmt = select(Movie).distinct()
-
-    if search:
-        stmt = stmt.join(Movie.directors, isouter=True).join(Movie.stars, isouter=True)
-        stmt = stmt.where(
-            sa.or_(
-                Movie.name.ilike(f"%{search}%"),
-                Movie.description.ilike(f"%{search}%"),
-                Director.name.ilike(f"%{search}%"),
-                Star.name.ilike(f"%{search}%")
-            )
+    include_parts = {part.strip() for part in include.split(",") if part.strip()} if include else set()
+    if include_parts - {"total", "facets"}:
+        raise HTTPException(status_code=400, detail="include accepts only: total, facets")
+
+    search_query = build_movie_search_query(search) if search else None
+    genre_ids = sorted(set(genre_ids)) if genre_ids else None
+    filters = build_movie_filters(search_query, year, min_rating, max_rating, genre_ids)
+    stmt = select(Movie).where(*filters)
+
+    summary = {}
+    if include_parts:
+        summary = await get_movie_list_summary(
+            db, filters, summary_cache,
+            with_facets="facets" in include_parts,
+            cache_key=None if search else (year, min_rating, max_rating, tuple(genre_ids or ())),
         )
 
-    if year:
-        stmt = stmt.where(Movie.year == year)
-    if min_rating:
-        stmt = stmt.where(Movie.imdb >= min_rating)
-    if max_rating:
-        stmt = stmt.where(Movie.imdb <= max_rating)
-
     sort_fields = {
         "release_date": Movie.year,
         "price": Movie.price,
         "rating": Movie.imdb,
         "popularity": Movie.votes,
+        "likes": Movie.likes_count,
     }
+    if search_query is not None:
+        sort_fields["relevance"] = sa.func.ts_rank_cd(
+            Movie.search_vector, search_query, type_=sa.Float
+        )
+
+    if sort_by not in sort_fields:
+        sort_by = "relevance" if search_query is not None else "release_date"
+    sort_column = sort_fields[sort_by]
+    descending = sort_order == "desc"
+
+    if cursor is None and pagination == "offset":
+        offset = (page - 1) * limit
+        if descending:
+            stmt = stmt.order_by(sort_column.desc(), Movie.id.desc())
+        else:
+            stmt = stmt.order_by(sort_column.asc(), Movie.id.asc())
+
+        stmt = stmt.limit(limit).offset(offset)
+
+        result = await db.execute(stmt)
+        movies = result.scalars().all()
+        if not include_parts:
+            return movies
+        return MovieListPage(
+            items=[MovieListItem.model_validate(movie) for movie in movies],
+            **summary,
+        )
 
-    sort_column = sort_fields.get(sort_by, Movie.year)
-    if sort_order == "desc":
-        stmt = stmt.order_by(sort_column.desc())
+    # Keyset pagination: the cursor pins (sort value, id) of a boundary row,
+    # so every page is an index range scan on (sort_column, id).
+    backwards = False
+    if cursor is not None:
+        try:
+            position = decode_cursor(cursor)
+            if position["sort_by"] != sort_by or position["sort_order"] != sort_order:
+                raise ValueError("Cursor does not match the requested sorting")
+            boundary = (sort_column.type.python_type(position["value"]), int(position["id"]))
+            backwards = position["direction"] == "prev"
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        key = sa.tuple_(sort_column, Movie.id)
+        if descending != backwards:
+            stmt = stmt.where(key < sa.tuple_(*boundary))
+        else:
+            stmt = stmt.where(key > sa.tuple_(*boundary))
+
+    if descending != backwards:
+        stmt = stmt.order_by(sort_column.desc(), Movie.id.desc())
     else:
-        stmt = stmt.order_by(sort_column.asc())
+        stmt = stmt.order_by(sort_column.asc(), Movie.id.asc())
+
+    stmt = stmt.add_columns(sort_column.label("sort_key"))
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = list(result.all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    def make_cursor(row, direction: str) -> str:
+        return encode_cursor({
+            "sort_by": sort_by,
+            "sort_order": sort_order,
+            "value": row.sort_key,
+            "id": row.Movie.id,
+            "direction": direction,
+        })
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = make_cursor(rows[-1], "next")
+        if (has_more and backwards) or (cursor is not None and not backwards):
+            prev_cursor = make_cursor(rows[0], "prev")
+
+    return MovieListPage(
+        items=[MovieListItem.model_validate(row.Movie) for row in rows],
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        **summary,
+    )
 
-    stmt = stmt.limit(limit).offset(offset)
 
-    result = await db.execute(stmt)
-    return result.scalars().all()
+async def get_movie_list_summary(
+    db: AsyncSession,
+    filters: list,
+    summary_cache: TTLCache,
+    with_facets: bool,
+    cache_key: tuple | None = None,
+) -> dict:
+    """Total (and optionally facets) for movies_list; free-text searches are never cached."""
+
+    if cache_key is not None:
+        cache_key = (with_facets, *cache_key)
+        cached = summary_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if with_facets:
+        summary = await get_movie_facets(db, filters)
+    else:
+        summary = {"total": await count_movies(db, filters)}
+
+    if cache_key is not None:
+        summary_cache.set(cache_key, summary)
+    return summary
 
 @router.get("/genres/", response_model=List[GenreCount])
 async def get_genres_with_counts(db: AsyncSession = Depends(get_postgresql_db)):
-    stmt = (
-        select(
-            Genre.id,
-            Genre.name,
-            sa.func.count(movie_genres.c.movie_id).label("movie_count")
-        )
-        .join(movie_genres, movie_genres.c.genre_id == Genre.id, isouter=True)
-        .group_by(Genre.id)
-        .order_by(sa.desc("movie_count"))
-    )
+    stmt = select(Genre).order_by(Genre.movie_count.desc(), Genre.id)
     result = await db.execute(stmt)
-    rows = result.all()
-    return [GenreCount(id=row.id, name=row.name, movie_count=row.movie_count) for row in rows]
+    return [GenreCount.model_validate(genre) for genre in result.scalars().all()]
 
-@router.get("/{movie_id}/", response_model=MovieRetrieve)
-async def get_movie(movie_id: int, db: AsyncSession = Depends(get_postgresql_db)) -> MovieRetrieve:
-    stmt = select(Movie).options(
-        selectinload(Movie.certification),
-        selectinload(Movie.genres),
-        selectinload(Movie.directors),
-        selectinload(Movie.stars),
-        selectinload(Movie.regions)
-    ).where(Movie.id == movie_id)
+@router.get("/cache/stats/", dependencies=[Depends(require_roles(["admin"]))])
+async def get_movie_cache_stats(cache: MovieCache = Depends(get_movie_cache)) -> dict:
+    return cache.stats()
 
-    result = await db.execute(stmt)
-    movie = result.scalar_one_or_none()
+@router.get("/batch/", response_model=MovieBatchResponse)
+async def get_movies_batch(
+    ids: List[int] = Query(..., description=f"Up to {MAX_BATCH_MOVIE_IDS} movie ids"),
+    db: AsyncSession = Depends(get_postgresql_db),
+    cache: MovieCache = Depends(get_movie_cache),
+) -> MovieBatchResponse:
+    movie_ids = list(dict.fromkeys(ids))
+    if len(movie_ids) > MAX_BATCH_MOVIE_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_MOVIE_IDS} movie ids can be requested at once"
+        )
 
-    if movie is None:
+    movies = await cache.get_many(movie_ids)
+    missed_ids = [movie_id for movie_id in movie_ids if movie_id not in movies]
+    if missed_ids:
+        loaded = await get_movies_retrieve(db, missed_ids)
+        await cache.set_many(loaded.values())
+        movies.update(loaded)
+
+    return MovieBatchResponse(
+        movies=[movies[movie_id] for movie_id in movie_ids if movie_id in movies],
+        missing_ids=[movie_id for movie_id in movie_ids if movie_id not in movies],
+    )
+
+@router.get("/{movie_id}/", response_model=MovieRetrieve)
+async def get_movie(
+    movie_id: int,
+    db: AsyncSession = Depends(get_postgresql_db),
+    cache: MovieCache = Depends(get_movie_cache),
+) -> MovieRetrieve:
+    cached = await cache.get(movie_id)
+    if cached is not None:
+        return cached
+
+    movie_data = await get_movie_retrieve(db, movie_id)
+    if movie_data is None:
         raise HTTPException(status_code=404, detail="Movie not found")
 
-    return MovieRetrieve.model_validate(movie)
+    await cache.set(movie_data)
+    return movie_data
 
 @router.post("/{movie_id}/like")
 async def like_movie(
     movie_id: int,
     db: AsyncSession = Depends(get_postgresql_db),
-    user: UserRetrieveSchema = Depends(get_current_user)
+    user: UserRetrieveSchema = Depends(get_current_user),
+    cache: MovieCache = Depends(get_movie_cache),
 ) -> dict:
-    movie = (await db.scalars(select(Movie).where(Movie.id == movie_id))).first()
-    if not movie:
-        raise HTTPException(status_code=404, detail="Movie not found")
-
-    existing = (
-        await db.scalars(
-            select(MovieLike).where(
-                MovieLike.user_id == user.id,
-                MovieLike.movie_id == movie_id
-            )
-        )
-    ).first()
-
-    if existing:
-        if existing.is_like:
-            return {"message": "You already liked this movie"}
-        else:
-            existing.is_like = True
-    else:
-        db.add(MovieLike(user_id=user.id, movie_id=movie_id, is_like=True))
-
     try:
+        changed = await upsert_movie_like(db, user.id, movie_id, is_like=True)
         await db.commit()
     except IntegrityError:
         await db.rollback()
-        raise HTTPException(status_code=400, detail="Already liked")
+        raise HTTPException(status_code=404, detail="Movie not found")
+
+    if not changed:
+        return {"message": "You already liked this movie"}
 
+    await cache.invalidate([movie_id])
     return {"message": "Movie liked"}
 
 @router.post("/{movie_id}/dislike")
 async def dislike_movie(
     movie_id: int,
     db: AsyncSession = Depends(get_postgresql_db),
-    user: UserRetrieveSchema = Depends(get_current_user)
+    user: UserRetrieveSchema = Depends(get_current_user),
+    cache: MovieCache = Depends(get_movie_cache),
 ) -> dict:
-    movie = (await db.scalars(select(Movie).where(Movie.id == movie_id))).first()
-    if not movie:
-        raise HTTPException(status_code=404, detail="Movie not found")
-
-    existing = (
-        await db.scalars(
-            select(MovieLike).where(
-                MovieLike.user_id == user.id,
-                MovieLike.movie_id == movie_id
-            )
-        )
-    ).first()
-
-    if existing:
-        if not existing.is_like:
-            return {"message": "You already disliked this movie"}
-        else:
-            existing.is_like = False
-    else:
-        db.add(MovieLike(user_id=user.id, movie_id=movie_id, is_like=False))
-
     try:
+        changed = await upsert_movie_like(db, user.id, movie_id, is_like=False)
         await db.commit()
     except IntegrityError:
         await db.rollback()
-        raise HTTPException(status_code=400, detail="Already disliked")
+        raise HTTPException(status_code=404, detail="Movie not found")
+
+    if not changed:
+        return {"message": "You already disliked this movie"}
 
+    await cache.invalidate([movie_id])
     return {"message": "Movie disliked"}
 
 @router.post("/{movie_id}/comments", response_model=CommentRetrieve, status_code=201)
@@ -204,17 +298,39 @@ async def create_comment(
 
     return comment
 
-@router.get("/{movie_id}/comments", response_model=List[CommentRetrieve])
+@router.get("/{movie_id}/comments", response_model=CommentPage)
 async def get_comments(
     movie_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
     db: AsyncSession = Depends(get_postgresql_db)
-) -> List[CommentRetrieve]:
+) -> CommentPage:
+    # Newest first; the cursor pins (created_at, id) of the last comment served,
+    # so each page is a range scan on ix_comments_movie_id_created_at_id.
+    stmt = select(Comment).where(Comment.movie_id == movie_id)
+    if cursor is not None:
+        try:
+            position = decode_cursor(cursor)
+            boundary = (datetime.datetime.fromisoformat(position["created_at"]), int(position["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(sa.tuple_(Comment.created_at, Comment.id) < sa.tuple_(*boundary))
+
     result = await db.execute(
-        select(Comment)
-        .where(Comment.movie_id == movie_id)
-        .order_by(Comment.created_at.desc())
+        stmt.order_by(Comment.created_at.desc(), Comment.id.desc()).limit(limit + 1)
+    )
+    comments = list(result.scalars().all())
+
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        last = comments[-1]
+        next_cursor = encode_cursor({"created_at": last.created_at.isoformat(), "id": last.id})
+
+    return CommentPage(
+        items=[CommentRetrieve.model_validate(comment) for comment in comments],
+        next_cursor=next_cursor,
     )
-    return result.scalars().all()
 
 @router.post("/favorites/{movie_id}", status_code=201)
 async def add_to_favorites(
@@ -280,37 +396,19 @@ async def rate_movie(
     rating: int,
     db: AsyncSession = Depends(get_postgresql_db),
     user: UserModel = Depends(get_current_user),
+    cache: MovieCache = Depends(get_movie_cache),
 ):
     if not (1 <= rating <= 10):
         raise HTTPException(status_code=400, detail="Rating must be between 1 and 10")
 
-    movie = await db.get(Movie, movie_id)
-    if not movie:
-        raise HTTPException(status_code=404, detail="Movie not found")
-
-    stmt = select(Rating).where(Rating.user_id == user.id, Rating.movie_id == movie_id)
-    result = await db.execute(stmt)
-    movie_rating = result.scalars().first()
-
-    if movie_rating:
-        movie_rating.rating = rating
-    else:
-        movie.votes += 1
-        movie_rating = Rating(user_id=user.id, movie_id=movie_id, rating=rating)
-        db.add(movie_rating)
-
-    stmt = select(Rating.rating).where(Rating.movie_id == movie_id)
-    result = await db.execute(stmt)
-    ratings = result.scalars().all()
-
-    if ratings:
-        average_rating = sum(ratings) / len(ratings)
-        movie.imdb = round(average_rating, 2)
-
     try:
+        movie_exists = await upsert_movie_rating(db, user.id, movie_id, rating)
+        if not movie_exists:
+            raise HTTPException(status_code=404, detail="Movie not found")
         await db.commit()
     except IntegrityError:
         await db.rollback()
-        raise HTTPException(status_code=400, detail="Error saving rating")
+        raise HTTPException(status_code=404, detail="Movie not found")
 
+    await cache.invalidate([movie_id])
     return {"message": "Rating saved"}
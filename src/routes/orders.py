@@ -1,100 +1,132 @@
+import hashlib
 from typing import List
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
 
 from src.config.settings import BaseAppSettings
 from src.schemas.orders import OrderSchema
-from src.config.dependencies import get_checkout_session, get_current_user
+from src.cart_store import CartStoreInterface
+from src.config.dependencies import get_cart_store, get_checkout_session, get_current_user, get_payment_gateway
 from src.config.settings_instance import get_settings
 from src.schemas.accounts import UserRetrieveSchema
 from src.database.session_postgres import get_postgresql_db
-from src.crud import split_available_movies
-from src.database.models.movies import Movie
-from src.database.models.shopping_cart import Cart, CartItem
-from src.database.models.orders import Order, OrderItem, OrderStatus
+from src.crud import (
+    create_order_from_cart_items, delete_in_progress_idempotency_record, get_idempotency_record,
+    lock_user_orders, save_idempotency_record
+)
+from src.database.models.orders import Order, OrderStatus
+from src.payments.interfaces import PaymentGatewayInterface
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
 
 
 router = APIRouter(prefix="/orders")
 
+IDEMPOTENCY_KEY_HEADER = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Retries with the same key replay the first successful response.",
+)
+
+
+def _request_hash(request: Request) -> str:
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    return hashlib.sha256(f"{request.method} {request.url.path}?{query}".encode()).hexdigest()
+
+
+async def _replay_idempotent_response(
+    db: AsyncSession, user_id: int, scope: str, key: str | None, request: Request
+) -> JSONResponse | None:
+    """
+    If this key was already used, return the stored response. A key reused
+    for a different request is rejected, and so is one whose first request
+    is still in progress. The caller holds the user's order lock.
+    """
+
+    if key is None:
+        return None
+
+    record = await get_idempotency_record(db, user_id, scope, key)
+    if record is None:
+        return None
+    if record.request_hash != _request_hash(request):
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    if record.response_status is None:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+    return JSONResponse(
+        status_code=record.response_status,
+        content=record.response_body,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def _commit_idempotent_response(
+    db: AsyncSession, user_id: int, scope: str, key: str | None,
+    request: Request, body: dict, settings: BaseAppSettings
+) -> dict:
+    if key is not None:
+        await save_idempotency_record(
+            db, user_id, scope, key, _request_hash(request),
+            response_status=200, response_body=body, ttl=settings.IDEMPOTENCY_KEY_TTL
+        )
+    await db.commit()
+    return body
+
+
 @router.post("/create/")
 async def create_order_from_cart(
+    request: Request,
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
     current_user: UserRetrieveSchema = Depends(get_current_user),
     db: AsyncSession = Depends(get_postgresql_db),
+    cart_store: CartStoreInterface = Depends(get_cart_store),
+    settings: BaseAppSettings = Depends(get_settings),
 ):
-    cart_movie_ids = (await db.execute(
-        sa.select(CartItem.movie_id)
-        .distinct()
-        .join(Cart, CartItem.cart_id == Cart.id)
-        .where(Cart.user_id == current_user.id)
-    )).scalars().all()
-
-    if not cart_movie_ids:
-        raise HTTPException(status_code=400, detail="Cart is empty")
-
-    purchased_ids = (await db.execute(
-        sa.select(OrderItem.movie_id)
-        .join(Order, OrderItem.order_id == Order.id)
-        .where(Order.user_id == current_user.id)
-        .where(Order.status == OrderStatus.PAID)
-    )).scalars().all()
+    # Flushing commits, so it has to happen before the lock is taken.
+    await cart_store.flush(db, current_user.id)
+
+    # Concurrent requests from the same user wait here, so the second one
+    # sees the first one's pending order (or its stored response).
+    await lock_user_orders(db, current_user.id)
+    replayed = await _replay_idempotent_response(db, current_user.id, "orders.create", idempotency_key, request)
+    if replayed is not None:
+        return replayed
+
+    result = await create_order_from_cart_items(
+        db, current_user.id, current_user.region.code if current_user.region else None
+    )
 
-    movie_ids_to_check = list(set(cart_movie_ids) - set(purchased_ids))
+    if not result.cart_count:
+        raise HTTPException(status_code=400, detail="Cart is empty")
 
-    if not movie_ids_to_check:
+    if not result.unpurchased_count:
         raise HTTPException(status_code=400, detail="All movies in cart already purchased")
 
-    available_ids, unavailable_ids = await split_available_movies(db, movie_ids_to_check, current_user.region.code)
-
-    if not available_ids:
-        return {
+    if not result.available_count:
+        return await _commit_idempotent_response(db, current_user.id, "orders.create", idempotency_key, request, {
             "order_created": False,
-            "unavailable_movie_ids": unavailable_ids,
+            "unavailable_movie_ids": result.unavailable_ids or [],
             "message": "All movies are unavailable or already purchased"
-        }
-
-    pending_ids = (await db.execute(
-        sa.select(OrderItem.movie_id)
-        .join(Order, OrderItem.order_id == Order.id)
-        .where(Order.user_id == current_user.id)
-        .where(Order.status == OrderStatus.PENDING)
-    )).scalars().all()
-
-    final_movie_ids = list(set(available_ids) - set(pending_ids))
+        }, settings)
 
-    if not final_movie_ids:
+    if result.order_id is None:
         raise HTTPException(status_code=400, detail="All movies already included in a pending order")
 
-    order = Order(user_id=current_user.id)
-    db.add(order)
-    await db.flush()
-
-    movies = (await db.execute(
-        sa.select(Movie.id, Movie.price)
-        .where(Movie.id.in_(final_movie_ids))
-    )).all()
-
-    total = 0
-    for m_id, price in movies:
-        db.add(OrderItem(order_id=order.id, movie_id=m_id, price_at_order=price))
-        total += price
-
-    order.total_amount = total
-    await db.commit()
-
-    return {
+    excluded_movie_ids = result.excluded_ids or []
+    return await _commit_idempotent_response(db, current_user.id, "orders.create", idempotency_key, request, {
         "order_created": True,
-        "order_id": order.id,
-        "total_amount": str(total),
-        "excluded_movie_ids": list(set(cart_movie_ids) - set(final_movie_ids)),
+        "order_id": result.order_id,
+        "total_amount": str(result.total_amount),
+        "excluded_movie_ids": excluded_movie_ids,
         "message": (
             "Some movies were excluded (unavailable, already purchased or already in a pending order)."
-            if len(final_movie_ids) < len(cart_movie_ids) else
+            if excluded_movie_ids else
             "All movies included."
         )
-    }
+    }, settings)
 
 
 @router.get("/", response_model=List[OrderSchema])
@@ -151,15 +183,42 @@ async def cancel_order_before_payment(
 @router.post("/confirm/")
 async def confirm_order(
     order_id: int,
+    request: Request,
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
     db: AsyncSession = Depends(get_postgresql_db),
     user: UserRetrieveSchema = Depends(get_current_user),
+    gateway: PaymentGatewayInterface = Depends(get_payment_gateway),
     settings: BaseAppSettings = Depends(get_settings)
 ) -> dict:
-    
-    session = await get_checkout_session(
-        order_id=order_id,
-        db=db,
-        user=user,
-        settings=settings
-    )
-    return session
\ No newline at end of file
+
+    scope = "orders.confirm"
+    if idempotency_key is not None:
+        await lock_user_orders(db, user.id)
+        replayed = await _replay_idempotent_response(db, user.id, scope, idempotency_key, request)
+        if replayed is not None:
+            return replayed
+        # Claim the key and release the lock before the gateway call. The
+        # call itself is deduplicated by the key passed on to the gateway.
+        await save_idempotency_record(
+            db, user.id, scope, idempotency_key, _request_hash(request),
+            response_status=None, response_body=None, ttl=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT
+        )
+        await db.commit()
+
+    try:
+        session = await get_checkout_session(
+            order_id=order_id,
+            db=db,
+            user=user,
+            gateway=gateway,
+            idempotency_key=idempotency_key,
+        )
+    except HTTPException:
+        if idempotency_key is not None:
+            await db.rollback()
+            await delete_in_progress_idempotency_record(db, user.id, scope, idempotency_key)
+            await db.commit()
+        raise
+    return await _commit_idempotent_response(
+        db, user.id, scope, idempotency_key, request, session, settings
+    )
\ No newline at end of file
@@ -1,16 +1,15 @@
 from decimal import Decimal
-import stripe
 from src.database.models.movies import PurchasedMovie
 from src.notifications.interfaces import EmailSenderInterface
-from src.config.settings import BaseAppSettings
 from src.database.models.orders import Order, OrderStatus
 from src.schemas.payment import PaymentHistoryItem, PaymentHistoryResponse, PaymentResponseSchema, PaymentStatusEnum
-from src.config.dependencies import get_accounts_email_notificator, get_current_user
-from src.config.settings_instance import get_settings
+from src.config.dependencies import get_accounts_email_notificator, get_current_user, get_payment_gateway
 from src.database.session_postgres import get_postgresql_db
+from src.exceptions.payment import PaymentGatewayUnavailableError
+from src.payments.interfaces import PaymentGatewayInterface
 from src.schemas.accounts import UserRetrieveSchema
 from src.database.models.payment import Payment, PaymentItem
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
@@ -19,16 +18,14 @@ router = APIRouter(prefix="/payment")
 
 @router.post("/success/", response_model=PaymentResponseSchema)
 async def success_payment(
-    background_tasks: BackgroundTasks,
     session_id: str = Query(...),
     db: AsyncSession = Depends(get_postgresql_db),
     user: UserRetrieveSchema = Depends(get_current_user),
     email_sender: EmailSenderInterface = Depends(get_accounts_email_notificator),
-    settings: BaseAppSettings = Depends(get_settings)
+    gateway: PaymentGatewayInterface = Depends(get_payment_gateway)
 ) -> PaymentResponseSchema:
     try:
-        stripe.api_key = settings.STRIPE_API_KEY
-        session = stripe.checkout.Session.retrieve(session_id)
+        session = await gateway.retrieve_checkout_session(session_id)
         order_id = int(session.metadata.get("order_id"))
 
         stmt = (
@@ -93,13 +90,13 @@ async def success_payment(
         result = await db.execute(stmt)
         payment_with_items = result.scalars().first()
 
-        background_tasks.add_task(
-            email_sender.send_successfull_payment_email,
-            str(user.email),
-            order.id
-        )
+        await email_sender.send_successfull_payment_email(str(user.email), order.id)
         return PaymentResponseSchema.model_validate(payment_with_items)
 
+    except HTTPException:
+        raise
+    except PaymentGatewayUnavailableError as e:
+        raise HTTPException(status_code=503, detail=e.user_message)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Payment verification failed: {str(e)}")
 
@@ -1,8 +1,9 @@
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Optional
 from pydantic import BaseModel, ConfigDict, EmailStr, StringConstraints, field_validator
 from src.schemas.regions import RegionSchema
 from src.database.models.regions import Region
+from src.database.models.accounts import UserGroupEnum
 from src.database.validators import validate_password_strength, validate_email_address
 
 
@@ -61,6 +62,7 @@ class UserLoginResponseSchema(BaseModel):
 
 class TokenRefreshResponseSchema(BaseModel):
     access_token: str
+    refresh_token: str
 
 
 class UserRetrieveSchema(BaseModel):
@@ -73,3 +75,8 @@ class UserRetrieveSchema(BaseModel):
     region: RegionSchema
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserAdminUpdateSchema(BaseModel):
+    group: Optional[UserGroupEnum] = None
+    is_active: Optional[bool] = None
@@ -12,10 +12,43 @@ class MovieListItem(BaseModel):
     year: int
     imdb: float
     price: float
+    likes_count: int
+    dislikes_count: int
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class YearFacet(BaseModel):
+    year: int
+    count: int
+
+
+class GenreFacet(BaseModel):
+    id: int
+    name: str
+    count: int
+
+
+class PriceBucketFacet(BaseModel):
+    min_price: float
+    max_price: Optional[float] = None
+    count: int
+
+
+class MovieFacets(BaseModel):
+    years: List[YearFacet]
+    genres: List[GenreFacet]
+    price_buckets: List[PriceBucketFacet]
+
+
+class MovieListPage(BaseModel):
+    items: List[MovieListItem]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    total: Optional[int] = None
+    facets: Optional[MovieFacets] = None
+
+
 class CommentCreate(BaseModel):
     text: str = Field(..., min_length=1, max_length=1000)
 
@@ -30,6 +63,11 @@ class CommentRetrieve(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CommentPage(BaseModel):
+    items: List[CommentRetrieve]
+    next_cursor: Optional[str] = None
+
+
 class GenreCount(BaseModel):
     id: int
     name: str
@@ -110,6 +148,8 @@ class MovieRetrieve(BaseModel):
     time: int
     imdb: float
     votes: int
+    likes_count: int
+    dislikes_count: int
     meta_score: Optional[float] = None
     gross: Optional[float] = None
     description: str
@@ -123,6 +163,11 @@ class MovieRetrieve(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MovieBatchResponse(BaseModel):
+    movies: List[MovieRetrieve]
+    missing_ids: List[int]
+
+
 class MovieOut(BaseModel):
     id: int
     name: str
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from passlib.context import CryptContext
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool so the
+    event loop keeps serving other requests while a hash is computed.
+
+    At most ``max_workers + max_pending`` calls are handed to the executor;
+    further callers wait on the event loop until a slot frees up. Queue wait
+    and run times are recorded for ``stats()``.
+    """
+
+    def __init__(self, rounds: int = 12, max_workers: int = 4, max_pending: int = 64) -> None:
+        self._context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        self._slots = asyncio.Semaphore(max_workers + max_pending)
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._waiting = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._rehashed = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        enqueued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, enqueued_at, func, *args)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    def _timed(self, enqueued_at: float, func: Callable[..., T], *args) -> T:
+        started_at = time.perf_counter()
+        wait = started_at - enqueued_at
+        try:
+            return func(*args)
+        finally:
+            self._completed += 1
+            self._wait_seconds += wait
+            self._max_wait_seconds = max(self._max_wait_seconds, wait)
+            self._run_seconds += time.perf_counter() - started_at
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self._context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verify ``password`` and, if the stored hash uses outdated settings
+        (e.g. a lower bcrypt cost), also return a replacement hash to persist.
+        """
+        valid, new_hash = await self._run(self._context.verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            self._rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        completed = self._completed
+        return {
+            "max_workers": self._max_workers,
+            "max_pending": self._max_pending,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "completed": completed,
+            "rehashed": self._rehashed,
+            "avg_wait_ms": round(self._wait_seconds / completed * 1000, 3) if completed else 0.0,
+            "max_wait_ms": round(self._max_wait_seconds * 1000, 3),
+            "avg_run_ms": round(self._run_seconds / completed * 1000, 3) if completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
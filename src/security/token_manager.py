@@ -1,8 +1,14 @@
 import datetime
+import hashlib
 from jose import jwt, JWTError, ExpiredSignatureError
 from src.exceptions.token import TokenExpiredError, InvalidTokenError
 
 
+def hash_token(token: str) -> str:
+    """Fixed-size digest under which a token is stored and looked up."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 class JWTTokenManager:
     def __init__(
             self, secret_key_access: str,